@@ -0,0 +1,103 @@
+"""
+`accel` - viper versions of the hot loops
+=========================================
+
+MicroPython only: this module fails to import (``ImportError``) or to
+compile (``SyntaxError``) where the viper emitter is missing, e.g. on the
+host. The callers keep their pure Python code and only take these versions
+when the import succeeds:
+
+* ``encode_4gray`` for ``epdcodec.encode_4gray``
+* ``transpose_pages`` for ``epdcodec.transpose_pages``
+* ``read24`` for ``bme680._read24``
+* ``mhz19_valid`` for ``MHZ19BSensor.is_valid``
+
+``tools/bench_accel.py`` checks both versions for equal results and times
+them.
+"""
+
+import micropython
+
+# hi, lo, hi + lo for every table pair seen so far, found by identity, so the
+# viper loop gets one table and a call allocates nothing
+_tables = []
+
+
+def _table(hi, lo):
+    tables = _tables
+    for i in range(0, len(tables), 3):
+        if tables[i] is hi and tables[i + 1] is lo:
+            return tables[i + 2]
+    table = bytes(hi) + bytes(lo)
+    tables.extend((hi, lo, table))
+    return table
+
+
+@micropython.viper
+def _encode(src, dst, table, span: int):
+    # viper takes at most four arguments, so start and end come in one int
+    s = ptr8(src)
+    d = ptr8(dst)
+    t = ptr8(table)
+    i = span >> 16
+    end = span & 0xffff
+    j = i * 2
+    while i < end:
+        d[i] = t[s[j]] | t[256 + s[j + 1]]
+        i += 1
+        j += 2
+
+
+def encode_4gray(src, dst, hi, lo, start=0, end=None):
+    """Same as ``epdcodec.encode_4gray``, without allocating."""
+    if end is None:
+        end = len(dst)
+    if end <= start:
+        return
+    _encode(src, dst, _table(hi, lo), start << 16 | end)
+
+
+@micropython.viper
+def _transpose(src, dst, wide: int, high: int):
+    s = ptr8(src)
+    d = ptr8(dst)
+    for i in range(wide):
+        j = (wide - 1 - i) * high
+        end = j + high
+        k = i
+        while j < end:
+            d[k] = s[j]
+            j += 1
+            k += wide
+
+
+def transpose_pages(src, dst, wide, high):
+    """Same as ``epdcodec.transpose_pages``."""
+    _transpose(src, dst, wide, high)
+
+
+@micropython.viper
+def _read24(arr) -> int:
+    p = ptr8(arr)
+    return (p[0] << 16) | (p[1] << 8) | p[2]
+
+
+def read24(arr):
+    """Same as ``bme680._read24``: unsigned 24-bit big endian as float."""
+    return float(_read24(arr))
+
+
+@micropython.viper
+def _mhz19_checksum(buf) -> int:
+    p = ptr8(buf)
+    checksum = 0
+    for i in range(1, 8):
+        checksum += p[i]
+    return (~checksum & 0xFF) + 1
+
+
+def mhz19_valid(buf):
+    """Same as ``MHZ19BSensor.is_valid``."""
+    if buf is None or len(buf) < 9 or buf[0] != 0xFF or buf[1] != 0x86:
+        return False
+    return _mhz19_checksum(buf) == buf[8]
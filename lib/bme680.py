@@ -39,6 +39,10 @@ MicroPython driver from BME680 air quality sensor, based on Adafruit_bme680
 import time
 import math
 from micropython import const
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
 from ubinascii import hexlify as hex
 try:
     import struct
@@ -72,6 +76,9 @@ _BME680_SAMPLERATES = (0, 1, 2, 4, 8, 16)
 _BME680_FILTERSIZES = (0, 1, 3, 7, 15, 31, 63, 127)
 
 _BME680_RUNGAS = const(0x10)
+_BME680_HEATER_SLOTS = const(10)
+_BME680_AMBIENT_BUCKET = const(5)  # degrees of ambient temperature sharing res_heat values
+_BME680_POLL_MARGIN = const(200)  # ms past the expected end of a conversion before giving up
 
 _LOOKUP_TABLE_1 = (2147483647.0, 2147483647.0, 2147483647.0, 2147483647.0, 2147483647.0,
                    2126008810.0, 2147483647.0, 2130303777.0, 2147483647.0, 2147483647.0,
@@ -83,7 +90,7 @@ _LOOKUP_TABLE_2 = (4096000000.0, 2048000000.0, 1024000000.0, 512000000.0, 255744
                    500000.0, 250000.0, 125000.0)
 
 
-def _read24(arr):
+def _read24_py(arr):
     """Parse an unsigned 24-bit value as a floating point and return it."""
     ret = 0.0
     #print([hex(i) for i in arr])
@@ -92,13 +99,85 @@ def _read24(arr):
         ret += float(b & 0xFF)
     return ret
 
+try:
+    from accel import read24 as _read24
+except (ImportError, SyntaxError):
+    _read24 = _read24_py
+
+
+def _idiv(a, b):
+    """Integer division truncating towards zero like C, for ``b > 0``."""
+    return a // b if a >= 0 else -(-a // b)
+
+def _sleep_ms(ms):
+    if hasattr(asyncio, 'sleep_ms'):
+        return asyncio.sleep_ms(ms)
+    return asyncio.sleep(ms / 1000)
+
+def _spi_mem_page(register):
+    """SPI memory page of a register: 0x00 for 0x80..0xFF, 0x10 for 0x00..0x7F, None for
+       the page select register that exists in both."""
+    if register == _BME680_REG_PAGE_SELECT:
+        return None
+    return 0x00 if register >= 0x80 else 0x10
+
+def _heater_duration(gas_wait):
+    """Heater time in ms encoded in a GAS_WAIT register value: 6 bit value times
+       the multiplication factor 1, 4, 16 or 64 in the top two bits."""
+    return (gas_wait & 0x3F) * (1, 4, 16, 64)[gas_wait >> 6]
+
+def _heater_wait(duration):
+    """GAS_WAIT register value for a heater time in ms (Bosch ``calc_heater_dur``)."""
+    if duration >= 0xFC0:
+        return 0xFF  # longest possible, 4032 ms
+    factor = 0
+    while duration > 0x3F:
+        duration //= 4
+        factor += 1
+    return duration + factor * 64
+
+def _heater_resistance(temperature, ambient, gh1, gh2, gh3, heat_range, heat_val):
+    """RES_HEAT register value for a heater temperature in degrees at an ambient
+       temperature, from the chip calibration (Bosch ``calc_heater_res``)."""
+    if temperature > 400:
+        temperature = 400
+    var1 = _idiv(ambient * gh3, 1000) * 256
+    var2 = (gh1 + 784) * _idiv(_idiv((gh2 + 154009) * temperature * 5, 100) + 3276800, 10)
+    var3 = var1 + _idiv(var2, 2)
+    var4 = _idiv(var3, heat_range + 4)
+    var5 = 131 * heat_val + 65536
+    res_heat = _idiv((_idiv(var4, var5) - 250) * 34 + 50, 100)
+    return 0 if res_heat < 0 else 255 if res_heat > 255 else res_heat
+
+
+class BME680Reading:
+    """Compensated values of one conversion, updated in place by ``read_all()``."""
+    def __init__(self):
+        self.temperature = 0.0
+        """Temperature in degrees celsius."""
+        self.humidity = 0.0
+        """Relative humidity in RH %."""
+        self.pressure = 0.0
+        """Barometric pressure in hectoPascals."""
+        self.gas = 0
+        """Gas resistance in ohms."""
+        self.heater_step = 0
+        """Step of the heater profile ``gas`` was measured with."""
+        self.gas_timestamp = None
+        """``time.ticks_ms()`` of the conversion ``gas`` comes from, ``None`` before the
+           first gas measurement."""
+        self.timestamp = 0
+        """``time.ticks_ms()`` at the end of the conversion."""
+
 
 class Adafruit_BME680:
     """Driver from BME680 air quality sensor
 
        :param int refresh_rate: Maximum number of readings per second. Faster property reads
-         will be from the previous reading."""
-    def __init__(self, *, refresh_rate=10):
+         will be from the previous reading.
+       :param bool fixed_point: Compensate with Bosch's integer formulas instead of floats,
+         see ``fixed_point``."""
+    def __init__(self, *, refresh_rate=10, fixed_point=False):
         """Check the BME680 was found, read the coefficients and enable the sensor for continuous
            reads."""
         self._write(_BME680_REG_SOFTRESET, [0xB6])
@@ -109,11 +188,14 @@ class Adafruit_BME680:
         if chip_id != _BME680_CHIPID:
             raise RuntimeError('Failed to find BME680! Chip ID 0x%x' % chip_id)
 
+        self._fixed_point = fixed_point
         self._read_calibration()
 
-        # set up heater
-        self._write(_BME680_BME680_RES_HEAT_0, [0x73])
-        self._write(_BME680_BME680_GAS_WAIT_0, [0x65])
+        # register/value pairs of one burst write (config, res_heat of every heater slot
+        # and CTRL_MEAS), and the last value written to the config registers, so
+        # unchanged ones are skipped (cleared by the soft reset above)
+        self._pairs = bytearray(2 * (4 + _BME680_HEATER_SLOTS))
+        self._shadow = {}
 
         self.sea_level_pressure = 1013.25
         """Pressure in hectoPascals at sea level. Used to calibrate ``altitude``."""
@@ -129,10 +211,31 @@ class Adafruit_BME680:
         self._adc_hum = None
         self._adc_gas = None
         self._gas_range = None
+        self._gas_index = 0
+        self._gas_timestamp = None
+        self._gas_new = False
         self._t_fine = None
 
+        self.gas_interval = 1
+        """Measure gas with every ``gas_interval``-th conversion only, the others skip the
+           heater and just take temperature, humidity and pressure; 0 to measure gas only
+           after ``request_gas()``. The reading keeps the last gas value meanwhile."""
+        self._gas_due = True
+        self._since_gas = 0
+        self._run_gas = True
+
+        self.ambient_temperature = None
+        """Ambient temperature in degrees for the heater set-points, ``None`` to follow
+           the measured temperature."""
+        self._heater_cache = {}
+        self.set_heater(320, 150)
+
         self._last_reading = time.ticks_ms()
         self._min_refresh_time = 1000 // refresh_rate
+        self._reading = BME680Reading()
+        self._data = bytearray(15)
+        self._ready_at = None
+        self._lock = None
 
     @property
     def pressure_oversample(self):
@@ -182,10 +285,51 @@ class Adafruit_BME680:
         else:
             raise RuntimeError("Invalid size")
 
+    @property
+    def fixed_point(self):
+        """True to compensate with the integer formulas of the Bosch reference driver on
+           small ints, False (default) for the float formulas. The results differ by at
+           most about 0.01 degrees, 0.06 %RH and 0.08 hPa, far below the sensor's accuracy
+           (see ``tools/bench_compensation.py``); the integer path allocates no
+           intermediate floats, and its intermediates stay below 2**30, so no long ints
+           either."""
+        return self._fixed_point
+
+    @fixed_point.setter
+    def fixed_point(self, value):
+        self._fixed_point = bool(value)
+        # the raw values of the last conversion are kept in the other engine's format
+        self._t_fine = None
+
+    def read_all(self):
+        """Temperature, humidity, pressure and gas from a single conversion.
+
+           Returns a ``BME680Reading``; the same object is updated on every call."""
+        self._perform_reading()
+        return self._update_reading()
+
+    def _update_reading(self):
+        reading = self._reading
+        reading.temperature = self._calc_temperature()
+        reading.humidity = self._calc_humidity()
+        reading.pressure = self._calc_pressure()
+        if self._gas_new:
+            self._gas_new = False
+            reading.gas = self._calc_gas()
+            reading.heater_step = self._gas_index
+            reading.gas_timestamp = self._gas_timestamp
+        reading.timestamp = self._last_reading
+        return reading
+
     @property
     def temperature(self):
         """The compensated temperature in degrees celsius."""
         self._perform_reading()
+        return self._calc_temperature()
+
+    def _calc_temperature(self):
+        if self._fixed_point:
+            return (((self._t_fine * 5) + 128) >> 8) / 100
         calc_temp = (((self._t_fine * 5) + 128) / 256)
         return calc_temp / 100
 
@@ -193,6 +337,11 @@ class Adafruit_BME680:
     def pressure(self):
         """The barometric pressure in hectoPascals"""
         self._perform_reading()
+        return self._calc_pressure()
+
+    def _calc_pressure(self):
+        if self._fixed_point:
+            return self._calc_pressure_int()
         var1 = (self._t_fine / 2) - 64000
         var2 = ((var1 / 4) * (var1 / 4)) / 2048
         var2 = (var2 * self._pressure_calibration[5]) / 4
@@ -212,10 +361,36 @@ class Adafruit_BME680:
         calc_pres += ((var1 + var2 + var3 + (self._pressure_calibration[6] * 128)) / 16)
         return calc_pres/100
 
+    def _calc_pressure_int(self):
+        # Bosch's formula rearranged so every intermediate stays a small int
+        # (below 2**30) across the operating range
+        p1, p2, p3, p4, p5, p6, p7, p8, p9, p10 = self._pressure_int
+        var1 = (self._t_fine >> 1) - 64000
+        # (var1 >> 2) squared, from var1 >> 3 and two bits less shift
+        square = (var1 >> 3) * (var1 >> 3)
+        var2 = (((square >> 9) * p6) >> 2) + var1 * p5
+        var2 = (var2 >> 14) + p4
+        var1 = ((((square >> 11) * p3) >> 4) + p2 * (var1 >> 2)) >> 17
+        var1 = p1 + ((var1 * p1) >> 15)
+        # (1048576 - adc - var2) * 6250 / var1 without the product
+        calc_pres, rest = divmod(1048576 - self._adc_pres - var2, var1)
+        calc_pres = calc_pres * 6250 + rest * 6250 // var1
+        var1 = (p9 * (((calc_pres >> 3) * (calc_pres >> 3)) >> 13)) >> 12
+        var2 = ((calc_pres >> 2) * p8) >> 13
+        var3 = calc_pres >> 8
+        var3 = (((var3 * var3 * p10) >> 8) * var3) >> 9
+        calc_pres += (var1 + var2 + var3 + p7) >> 4
+        return calc_pres / 100
+
     @property
     def humidity(self):
         """The relative humidity in RH %"""
         self._perform_reading()
+        return self._calc_humidity()
+
+    def _calc_humidity(self):
+        if self._fixed_point:
+            return self._calc_humidity_int()
         temp_scaled = ((self._t_fine * 5) + 128) / 256
         var1 = ((self._adc_hum - (self._humidity_calibration[0] * 16)) -
                 ((temp_scaled * self._humidity_calibration[2]) / 200))
@@ -237,6 +412,24 @@ class Adafruit_BME680:
             calc_hum = 0
         return calc_hum
 
+    def _calc_humidity_int(self):
+        h1, h2, h3, h4, h5, h6, h7 = self._humidity_int
+        temp_scaled = ((self._t_fine * 5) + 128) >> 8
+        var1 = self._adc_hum - h1 - (_idiv(temp_scaled * h3, 100) >> 1)
+        var2 = (h2 * (_idiv(temp_scaled * h4, 100) +
+                      _idiv((temp_scaled * _idiv(temp_scaled * h5, 100)) >> 6, 100) +
+                      16384)) >> 10
+        var3 = var1 * var2
+        var4 = (h6 + _idiv(temp_scaled * h7, 100)) >> 4
+        var5 = ((var3 >> 14) * (var3 >> 14)) >> 10
+        var6 = (var4 * var5) >> 1
+        calc_hum = (((var3 + var6) >> 10) * 1000) >> 12
+        if calc_hum > 100000:
+            calc_hum = 100000
+        if calc_hum < 0:
+            calc_hum = 0
+        return calc_hum / 1000
+
     @property
     def altitude(self):
         """The altitude based on current ``pressure`` vs the sea level pressure
@@ -246,8 +439,26 @@ class Adafruit_BME680:
 
     @property
     def gas(self):
-        """The gas resistance in ohms"""
+        """The gas resistance in ohms, from the last conversion that measured gas"""
         self._perform_reading()
+        return self._calc_gas()
+
+    def _calc_gas(self):
+        if self._fixed_point:
+            # var3 / var2 of the Bosch formula, both divided by 8, rounded: a
+            # long division of mantissa << shift, 7 bits at a time
+            var2, mantissa, shift = self._gas_int[self._gas_range]
+            var2 += self._adc_gas << 12
+            calc_gas, rest = divmod(mantissa, var2)
+            while shift:
+                step = 7 if shift > 7 else shift
+                rest <<= step
+                calc_gas = (calc_gas << step) + rest // var2
+                rest %= var2
+                shift -= step
+            if rest << 1 >= var2:
+                calc_gas += 1
+            return calc_gas
         var1 = ((1340 + (5 * self._sw_err)) * (_LOOKUP_TABLE_1[self._gas_range])) / 65536
         var2 = ((self._adc_gas * 32768) - 16777216) + var1
         var3 = (_LOOKUP_TABLE_2[self._gas_range] * var1) / 512
@@ -256,36 +467,191 @@ class Adafruit_BME680:
 
     def _perform_reading(self):
         """Perform a single-shot reading from the sensor and fill internal data structure for
-           calculations"""
-        expired = time.ticks_diff(self._last_reading, time.ticks_ms()) * time.ticks_diff(0, 1)
-        if 0 <= expired < self._min_refresh_time:
-            time.sleep_ms(self._min_refresh_time - expired)
-
-        # set filter
-        self._write(_BME680_REG_CONFIG, [self._filter << 2])
-        # turn on temp oversample & pressure oversample
-        self._write(_BME680_REG_CTRL_MEAS,
-                    [(self._temp_oversample << 5)|(self._pressure_oversample << 2)])
-        # turn on humidity oversample
-        self._write(_BME680_REG_CTRL_HUM, [self._humidity_oversample])
-        # gas measurements enabled
-        self._write(_BME680_REG_CTRL_GAS, [_BME680_RUNGAS])
-
-        ctrl = self._read_byte(_BME680_REG_CTRL_MEAS)
-        ctrl = (ctrl & 0xFC) | 0x01  # enable single shot!
-        self._write(_BME680_REG_CTRL_MEAS, [ctrl])
-        new_data = False
-        while not new_data:
-            data = self._read(_BME680_REG_MEAS_STATUS, 15)
-            new_data = data[0] & 0x80 != 0
-            time.sleep(0.005)
+           calculations. Within the refresh period the previous reading is kept."""
+        expired = time.ticks_diff(time.ticks_ms(), self._last_reading)
+        if self._t_fine is not None and 0 <= expired < self._min_refresh_time:
+            return
+        self.trigger()
+        self._collect()
+
+    def measurement_duration(self, gas=True):
+        """Expected duration of a forced-mode conversion in ms, from the oversampling
+           settings and, with ``gas``, the heater time (Bosch BME68x ``calc_profile_dur``)."""
+        cycles = (_BME680_SAMPLERATES[self._temp_oversample] +
+                  _BME680_SAMPLERATES[self._pressure_oversample] +
+                  _BME680_SAMPLERATES[self._humidity_oversample])
+        duration = cycles * 1963
+        duration += 477 * 4  # TPH switching duration
+        duration += 477 * 5  # gas measurement duration
+        duration += 500  # round to the closest whole ms
+        duration = duration // 1000 + 1  # wake up duration of 1 ms
+        if gas:
+            duration += _heater_duration(self._heater_waits[self._heater_step])
+        return duration
+
+    def request_gas(self):
+        """Measure gas with the next conversion, whatever ``gas_interval`` says."""
+        self._gas_due = True
+
+    def set_heater(self, temperature=320, duration=150):
+        """Heat the gas sensor to ``temperature`` degrees (up to 400) for ``duration`` ms
+           before every gas conversion. A shorter time saves energy and conversion time,
+           the sensor needs to reach a stable temperature though."""
+        self.set_heater_profile(((temperature, duration),))
+
+    def set_heater_profile(self, steps):
+        """Program a heater profile of up to 10 ``(temperature, duration)`` steps into the
+           heater slots. Consecutive gas conversions run one step each, in turn; the
+           ``heater_step`` of a ``BME680Reading`` tells which one ``gas`` belongs to.
+
+           The RES_HEAT values are computed from the calibration and the ambient
+           temperature, cached per temperature and 5 degree ambient bucket, and rewritten
+           with the next conversion when the ambient temperature changes bucket."""
+        if not 0 < len(steps) <= _BME680_HEATER_SLOTS:
+            raise ValueError('1 to %d heater steps' % _BME680_HEATER_SLOTS)
+        self._heater_temperatures = tuple(min(int(step[0]), 400) for step in steps)
+        self._heater_waits = bytes(_heater_wait(int(step[1])) for step in steps)
+        self._heater_step = 0
+        self._heater_bucket = None
+        count = self._heater_pairs(0)
+        pairs = bytearray(2 * count + 2 * len(steps))
+        pairs[:2 * count] = self._pairs[:2 * count]
+        for slot, gas_wait in enumerate(self._heater_waits):
+            pairs[2 * count] = _BME680_BME680_GAS_WAIT_0 + slot
+            pairs[2 * count + 1] = gas_wait
+            count += 1
+        self._write_pairs(pairs, count)
+
+    def _heater_pairs(self, count):
+        """Queue the RES_HEAT registers of the profile in ``_pairs`` after ``count`` pairs
+           when the ambient temperature moved to another bucket, return the new count."""
+        ambient = self.ambient_temperature
+        if ambient is None:
+            # the last measurement, 25 degrees before the first one
+            ambient = 25 if self._t_fine is None else ((self._t_fine * 5 + 128) >> 8) // 100
+        bucket = int(ambient) // _BME680_AMBIENT_BUCKET
+        if bucket == self._heater_bucket:
+            return count
+        self._heater_bucket = bucket
+        cache = self._heater_cache
+        shadow = self._shadow
+        pairs = self._pairs
+        for slot, temperature in enumerate(self._heater_temperatures):
+            key = (temperature, bucket)
+            res_heat = cache.get(key)
+            if res_heat is None:
+                gh1, gh2, gh3 = self._gas_calibration
+                res_heat = cache[key] = _heater_resistance(
+                    temperature, bucket * _BME680_AMBIENT_BUCKET + _BME680_AMBIENT_BUCKET // 2,
+                    int(gh1), int(gh2), int(gh3), int(self._heat_range), self._heat_val)
+            register = _BME680_BME680_RES_HEAT_0 + slot
+            if shadow.get(register) != res_heat:
+                shadow[register] = res_heat
+                pairs[2 * count] = register
+                pairs[2 * count + 1] = res_heat
+                count += 1
+        return count
+
+    def trigger(self):
+        """Start a forced-mode conversion and return its expected duration in ms.
+           ``collect()`` returns the result, other work can be done in between."""
+        run_gas = self._gas_due or 0 < self.gas_interval <= self._since_gas + 1
+        self._run_gas = run_gas
+        # heater set-points if the ambient temperature changed, filter, humidity oversample
+        # and gas enable with the heater step where changed, then temp & pressure
+        # oversample with single shot enabled, all in one burst
+        count = self._config_pairs(self._heater_pairs(0))
+        pairs = self._pairs
+        pairs[2 * count] = _BME680_REG_CTRL_MEAS
+        pairs[2 * count + 1] = (self._temp_oversample << 5) | (self._pressure_oversample << 2) | 0x01
+        self._write_pairs(pairs, count + 1)
+        duration = self.measurement_duration(run_gas)
+        self._ready_at = time.ticks_add(time.ticks_ms(), duration)
+        if run_gas:
+            self._gas_due = False
+            self._since_gas = 0
+            self._heater_step = (self._heater_step + 1) % len(self._heater_waits)
+        else:
+            self._since_gas += 1
+        return duration
+
+    def collect(self):
+        """Wait for the conversion started by ``trigger()`` and return it as the
+           ``BME680Reading`` of ``read_all()``."""
+        if self._ready_at is None:
+            self.trigger()
+        self._collect()
+        return self._update_reading()
+
+    def _collect(self):
+        remaining = time.ticks_diff(self._ready_at, time.ticks_ms())
+        if remaining > 0:
+            time.sleep_ms(remaining)
+        data = self._data
+        while not self._poll_status(data):
+            # not done after the computed time, fall back to polling
+            time.sleep_ms(5)
+        self._finish(data)
+
+    def _poll_status(self, data):
+        """Read the status into ``data``, True once the conversion is done. Raises
+           ``OSError`` when it is still not done ``_BME680_POLL_MARGIN`` ms after the
+           expected time, e.g. with the sensor gone or every transfer failing."""
+        self._read_status(data)
+        if data[0] & 0x80:
+            return True
+        if time.ticks_diff(time.ticks_ms(), self._ready_at) > _BME680_POLL_MARGIN:
+            self._ready_at = None
+            raise OSError('BME680 conversion timed out')
+        return False
+
+    def _read_status(self, data):
+        """Read the 15 bytes at MEAS_STATUS into ``data``. The new_data flag is cleared
+           first, so a transfer that fails without raising (``BME680_SPI``) reads as a
+           conversion still running instead of repeating the last one."""
+        data[0] = 0
+        self._read_into(_BME680_REG_MEAS_STATUS, data)
+
+    def _finish(self, data):
+        self._ready_at = None
         self._last_reading = time.ticks_ms()
-
+        self._parse_gas(data)
+        self._parse(data)
+
+    def _parse_gas(self, data):
+        """Take the gas ADC values if the conversion measured gas (gas_valid), otherwise
+           the last ones stay."""
+        if data[14] & 0x20:
+            self._adc_gas = (data[13] << 2) | (data[14] >> 6)
+            self._gas_range = data[14] & 0x0F
+            self._gas_index = data[0] & 0x0F
+            self._gas_timestamp = self._last_reading
+            self._gas_new = True
+
+    async def measure(self):
+        """Awaitable ``read_all()``: other tasks keep running during the conversion and
+           heater time. Concurrent callers share the sensor one after the other."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            expired = time.ticks_diff(time.ticks_ms(), self._last_reading)
+            if self._t_fine is None or not 0 <= expired < self._min_refresh_time:
+                await _sleep_ms(self.trigger())
+                data = self._data
+                while not self._poll_status(data):
+                    await _sleep_ms(5)
+                self._finish(data)
+            return self._update_reading()
+
+    def _parse(self, data):
+        """Fill the temperature, pressure and humidity ADC values and ``_t_fine`` from the
+           15 bytes at MEAS_STATUS"""
+        if self._fixed_point:
+            self._parse_int(data)
+            return
         self._adc_pres = _read24(data[2:5]) / 16
         self._adc_temp = _read24(data[5:8]) / 16
         self._adc_hum = struct.unpack('>H', bytes(data[8:10]))[0]
-        self._adc_gas = int(struct.unpack('>H', bytes(data[13:15]))[0] / 64)
-        self._gas_range = data[14] & 0x0F
 
         var1 = (self._adc_temp / 8) - (self._temp_calibration[0] * 2)
         var2 = (var1 * self._temp_calibration[1]) / 2048
@@ -294,14 +660,43 @@ class Adafruit_BME680:
 
         self._t_fine = int(var2 + var3)
 
+    def _parse_int(self, data):
+        self._adc_pres = (data[2] << 12) | (data[3] << 4) | (data[4] >> 4)
+        self._adc_temp = (data[5] << 12) | (data[6] << 4) | (data[7] >> 4)
+        self._adc_hum = (data[8] << 8) | data[9]
+
+        t1, t2, t3 = self._temp_int
+        var1 = (self._adc_temp >> 3) - t1
+        var2 = (var1 * t2) >> 11
+        var3 = ((var1 >> 1) * (var1 >> 1)) >> 12
+        var3 = (var3 * t3) >> 14
+
+        self._t_fine = var2 + var3
+
+    def _config_pairs(self, count):
+        """Queue the config registers that differ from the last written values in
+           ``_pairs`` after ``count`` pairs and return the new count."""
+        pairs = self._pairs
+        shadow = self._shadow
+        for register, value in ((_BME680_REG_CONFIG, self._filter << 2),
+                                (_BME680_REG_CTRL_HUM, self._humidity_oversample),
+                                (_BME680_REG_CTRL_GAS,
+                                 (_BME680_RUNGAS if self._run_gas else 0) | self._heater_step)):
+            if shadow.get(register) != value:
+                shadow[register] = value
+                pairs[2 * count] = register
+                pairs[2 * count + 1] = value
+                count += 1
+        return count
+
     def _read_calibration(self):
         """Read & save the calibration coefficients"""
         coeff = self._read(_BME680_BME680_COEFF_ADDR1, 25)
         coeff += self._read(_BME680_BME680_COEFF_ADDR2, 16)
 
-        coeff = list(struct.unpack('<hbBHhbBhhbbHhhBBBHbbbBbHhbb', bytes(coeff[1:39])))
+        raw = struct.unpack('<hbBHhbBhhbbHhhBBBHbbbBbHhbb', bytes(coeff[1:39]))
         # print("\n\n",coeff)
-        coeff = [float(i) for i in coeff]
+        coeff = [float(i) for i in raw]
         self._temp_calibration = [coeff[x] for x in [23, 0, 1]]
         self._pressure_calibration = [coeff[x] for x in [3, 4, 5, 7, 8, 10, 9, 12, 13, 14]]
         self._humidity_calibration = [coeff[x] for x in [17, 16, 18, 19, 20, 21, 22]]
@@ -314,8 +709,33 @@ class Adafruit_BME680:
 
         self._heat_range = (self._read_byte(0x02) & 0x30) / 16
         self._heat_val = self._read_byte(0x00)
+        if self._heat_val > 127:
+            self._heat_val -= 256  # signed
         self._sw_err = (self._read_byte(0x04) & 0xF0) / 16
 
+        # Constants of the fixed-point engine, with the shifts of the Bosch formulas
+        # folded in. H1/H2 are split like above so both engines use the same values:
+        # H1 * 16 is the raw 16 bit word, H2 takes its low nibble.
+        self._temp_int = (raw[23] << 1, raw[0], raw[1] << 4)
+        p = [raw[x] for x in [3, 4, 5, 7, 8, 10, 9, 12, 13, 14]]
+        self._pressure_int = (p[0], p[1], p[2] << 5, p[3] << 4, p[4] << 1, p[5],
+                              p[6] << 7, p[7], p[8], p[9])
+        self._humidity_int = (raw[17], (raw[16] << 4) + (raw[17] & 0x0F), raw[18], raw[19],
+                              raw[20], raw[21] << 7, raw[22])
+        # the gas terms that only depend on the range, per range, scaled into
+        # small ints: (var1 - 16777216) / 8 and var3 / 8 as (mantissa, shift)
+        sw_err = int(self._sw_err)
+        gas = []
+        for i in range(16):
+            var1 = ((1340 + 5 * sw_err) * int(_LOOKUP_TABLE_1[i])) >> 16
+            mantissa = (int(_LOOKUP_TABLE_2[i]) * var1) >> 12
+            shift = 0
+            while mantissa >= 0x20000000:
+                mantissa >>= 1
+                shift += 1
+            gas.append(((var1 - 16777216 + 4) >> 3, mantissa, shift))
+        self._gas_int = tuple(gas)
+
     def _read_byte(self, register):
         """Read a byte register value and return it"""
         return self._read(register, 1)[0]
@@ -323,9 +743,19 @@ class Adafruit_BME680:
     def _read(self, register, length):
         raise NotImplementedError()
 
+    def _read_into(self, register, buf):
+        """Read ``len(buf)`` bytes from 'register' into ``buf``"""
+        buf[:] = self._read(register, len(buf))
+
     def _write(self, register, values):
         raise NotImplementedError()
 
+    def _write_pairs(self, pairs, count):
+        """Write the first ``count`` register/value pairs of ``pairs``, in as few bus
+           transactions as the transport allows."""
+        for i in range(count):
+            self._write(pairs[2 * i], pairs[2 * i + 1:2 * i + 2])
+
 class BME680_I2C(Adafruit_BME680):
     """Driver for I2C connected BME680.
 
@@ -333,13 +763,14 @@ class BME680_I2C(Adafruit_BME680):
         :param int address: I2C device address
         :param bool debug: Print debug statements when True.
         :param int refresh_rate: Maximum number of readings per second. Faster property reads
-          will be from the previous reading."""
-    def __init__(self, i2c, address=0x77, debug=False, *, refresh_rate=10):
+          will be from the previous reading.
+        :param bool fixed_point: Integer instead of float compensation."""
+    def __init__(self, i2c, address=0x77, debug=False, *, refresh_rate=10, fixed_point=False):
         """Initialize the I2C device at the 'address' given"""
         self._i2c = i2c
         self._address = address
         self._debug = debug
-        super().__init__(refresh_rate=refresh_rate)
+        super().__init__(refresh_rate=refresh_rate, fixed_point=fixed_point)
 
     def _read(self, register, length):
         """Returns an array of 'length' bytes from the 'register'"""
@@ -349,13 +780,28 @@ class BME680_I2C(Adafruit_BME680):
             print("\t${:x} read ".format(register), " ".join(["{:02x}".format(i) for i in result]))
         return result
 
+    def _read_into(self, register, buf):
+        """Reads 'len(buf)' bytes from the 'register' into buf"""
+        self._i2c.readfrom_mem_into(self._address, register & 0xff, buf)
+        if self._debug:
+            print("\t${:x} read ".format(register), " ".join(["{:02x}".format(i) for i in buf]))
+
     def _write(self, register, values):
         """Writes an array of 'length' bytes to the 'register'"""
         if self._debug:
             print("\t${:x} write".format(register), " ".join(["{:02x}".format(i) for i in values]))
-        for value in values:
-            self._i2c.writeto_mem(self._address, register, bytearray([value & 0xFF]))
-            register += 1
+        pairs = bytearray(2 * len(values))
+        for i, value in enumerate(values):
+            pairs[2 * i] = register + i
+            pairs[2 * i + 1] = value & 0xFF
+        self._i2c.writeto(self._address, pairs)
+
+    def _write_pairs(self, pairs, count):
+        """Writes register/value pairs in a single transaction; the BME680 takes
+           multiple writes as alternating register address and data bytes."""
+        if self._debug:
+            print("\twrite", " ".join(["{:02x}".format(i) for i in pairs[:2 * count]]))
+        self._i2c.writeto(self._address, memoryview(pairs)[:2 * count])
 
 
 class BME680_SPI(Adafruit_BME680):
@@ -366,41 +812,48 @@ class BME680_SPI(Adafruit_BME680):
         :param bool debug: Print debug statements when True.
         :param int refresh_rate: Maximum number of readings per second. Faster property reads
           will be from the previous reading.
+        :param bool fixed_point: Integer instead of float compensation.
       """
 
-    def __init__(self, spi, cs, debug=False, *, refresh_rate=10):
+    def __init__(self, spi, cs, debug=False, *, refresh_rate=10, fixed_point=False):
         self._spi = spi
         self._cs = cs
         self._debug = debug
+        self._page = None  # memory page selected in the chip, None if unknown
+        self._address = bytearray(1)
+        self._frame = bytearray(2 * (4 + _BME680_HEATER_SLOTS))
         self._cs(1)
-        super().__init__(refresh_rate=refresh_rate)
+        super().__init__(refresh_rate=refresh_rate, fixed_point=fixed_point)
 
     def _read(self, register, length):
-        if register != _BME680_REG_PAGE_SELECT:
-            # _BME680_REG_PAGE_SELECT exists in both SPI memory pages
-            # For all other registers, we must set the correct memory page
-            self._set_spi_mem_page(register)
-        register = (register | 0x80) & 0xFF  # Read single, bit 7 high.
+        result = bytearray(length)
+        if self._read_into(register, result) is None:
+            return None
+        return result
+
+    def _read_into(self, register, buf):
+        """Reads 'len(buf)' bytes from the 'register' into buf in one CS frame, returns
+           None on a bus error"""
+        self._set_spi_mem_page(register)
+        self._address[0] = (register | 0x80) & 0xFF  # Read single, bit 7 high.
 
         try:
             self._cs(0)
-            self._spi.write(bytearray([register]))  # pylint: disable=no-member
-            result = bytearray(length)
-            self._spi.readinto(result)  # pylint: disable=no-member
+            self._spi.write(self._address)  # pylint: disable=no-member
+            self._spi.readinto(buf)  # pylint: disable=no-member
             if self._debug:
-                print("\t${:x} read ".format(register), " ".join(["{:02x}".format(i) for i in result]))
+                print("\t${:x} read ".format(register), " ".join(["{:02x}".format(i) for i in buf]))
         except Exception as e:
             print (e)
-            result = None
+            return None
         finally:
             self._cs(1)
-        return result
+        return buf
 
     def _write(self, register, values):
-        if register != _BME680_REG_PAGE_SELECT:
-            # _BME680_REG_PAGE_SELECT exists in both SPI memory pages
-            # For all other registers, we must set the correct memory page
-            self._set_spi_mem_page(register)
+        self._set_spi_mem_page(register)
+        if register == _BME680_REG_SOFTRESET:
+            self._page = None  # the reset selects page 0 again, don't rely on it
         register &= 0x7F  # Write, bit 7 low.
         try:
             self._cs(0)
@@ -416,8 +869,43 @@ class BME680_SPI(Adafruit_BME680):
         finally:
             self._cs(1)
 
+    def _write_pairs(self, pairs, count):
+        """Writes register/value pairs, one CS frame for each run of registers in the same
+           memory page; the BME680 takes multiple writes as address/data pairs."""
+        frame = self._frame
+        if len(frame) < 2 * count:
+            frame = self._frame = bytearray(2 * count)
+        i = 0
+        while i < count:
+            page = _spi_mem_page(pairs[2 * i])
+            self._set_spi_mem_page(pairs[2 * i])
+            n = 0
+            while i < count and _spi_mem_page(pairs[2 * i]) in (page, None):
+                frame[2 * n] = pairs[2 * i] & 0x7F  # Write, bit 7 low.
+                frame[2 * n + 1] = pairs[2 * i + 1]
+                n += 1
+                i += 1
+            if self._debug:
+                print("\twrite", " ".join(["{:02x}".format(b) for b in frame[:2 * n]]))
+            try:
+                self._cs(0)
+                self._spi.write(memoryview(frame)[:2 * n])  # pylint: disable=no-member
+            except Exception as e:
+                print (e)
+            finally:
+                self._cs(1)
+
     def _set_spi_mem_page(self, register):
-        spi_mem_page = 0x00
-        if register < 0x80:
-            spi_mem_page = 0x10
-        self._write(_BME680_REG_PAGE_SELECT, [spi_mem_page])
+        """Switch the memory page for 'register' if the chip is not on it already"""
+        spi_mem_page = _spi_mem_page(register)
+        if spi_mem_page is None or spi_mem_page == self._page:
+            return
+        self._page = spi_mem_page
+        try:
+            self._cs(0)
+            self._spi.write(bytes((_BME680_REG_PAGE_SELECT, spi_mem_page)))  # pylint: disable=no-member
+        except Exception as e:
+            print (e)
+            self._page = None
+        finally:
+            self._cs(1)
@@ -0,0 +1,191 @@
+"""
+`charts` - ring buffer history and sparkline widget
+===================================================
+
+``History`` keeps the last ``size`` samples in a preallocated array with a
+running sum, so appending and the mean are O(1).
+
+``Sparkline`` is a ``widgets.Value``-like widget that owns a small GS2_HMSB
+bitmap. Every column aggregates ``per_column`` samples and shows their
+min/max band plus a line through the last values. A new column scrolls the
+bitmap one pixel to the left and only the new column is drawn, so a render
+costs O(new samples). The whole series is only drawn again when a sample
+leaves the vertical range and the chart rescales.
+"""
+
+from array import array
+
+import framebuf
+
+from fonts import RAMP
+from widgets import Widget
+
+
+class History:
+    """Fixed-size ring buffer of floats, oldest sample first."""
+
+    def __init__(self, size):
+        self.size = size
+        self._data = array('f', [0.0] * size)
+        self._start = 0
+        self._count = 0
+        self.total = 0.0
+
+    def append(self, value):
+        data = self._data
+        if self._count < self.size:
+            data[(self._start + self._count) % self.size] = value
+            self._count += 1
+        else:
+            self.total -= data[self._start]
+            data[self._start] = value
+            self._start = (self._start + 1) % self.size
+        self.total += value
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return self._data[(self._start + index) % self.size]
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._data[(self._start + i) % self.size]
+
+    def mean(self):
+        return self.total / self._count if self._count else 0.0
+
+    def clear(self):
+        self._start = 0
+        self._count = 0
+        self.total = 0.0
+
+
+class Sparkline(Widget):
+    """History chart of ``w`` x ``h`` pixels, one column per ``per_column``
+    samples.
+
+    :param float span: smallest vertical range, keeps noise flat
+    :param lo: fixed lower bound, autoscaled when ``None``
+    :param hi: fixed upper bound, autoscaled when ``None``
+    :param band_color: colour of the min/max band, default one step from
+        the background towards the line colour"""
+
+    static = False
+
+    def __init__(self, x, y, w, h, per_column=1, span=1.0, lo=None, hi=None,
+                 color=None, band_color=None):
+        super().__init__(x, y, w, h, color)
+        self.per_column = per_column
+        self.span = span
+        self.fixed = lo is not None and hi is not None
+        self.lo = lo
+        self.hi = hi
+        self.band_color = band_color
+        self.mins = array('f', [0.0] * w)
+        self.maxs = array('f', [0.0] * w)
+        self.lasts = array('f', [0.0] * w)
+        self.columns = 0        # filled columns, up to w
+        self._head = 0          # ring index of the newest column
+        self._samples = 0       # samples in the newest column
+        self._buf = bytearray(((w + 3) // 4) * h)
+        self._fb = framebuf.FrameBuffer(self._buf, w, h, framebuf.GS2_HMSB)
+        self._shift = 0         # columns appended since the last draw
+        self._redraw = True
+        self._colors = None
+        self.changed = True
+
+    def append(self, value):
+        if self._samples == self.per_column or not self.columns:
+            if self.columns:
+                self._head = (self._head + 1) % self.w
+            if self.columns < self.w:
+                self.columns += 1
+            self.mins[self._head] = self.maxs[self._head] = value
+            self._samples = 0
+            self._shift += 1
+        head = self._head
+        if value < self.mins[head]:
+            self.mins[head] = value
+        if value > self.maxs[head]:
+            self.maxs[head] = value
+        self.lasts[head] = value
+        self._samples += 1
+        if not self.fixed and (self.lo is None or value < self.lo or value > self.hi):
+            self._rescale()
+        self.changed = True
+
+    def _rescale(self):
+        lo = hi = self.lasts[self._head]
+        for i in range(self.columns):
+            column = (self._head - i) % self.w
+            lo = min(lo, self.mins[column])
+            hi = max(hi, self.maxs[column])
+        # headroom, so the next samples rarely force another full draw
+        pad = max(self.span, hi - lo) / 4
+        self.lo = lo - pad
+        self.hi = hi + pad
+        self._redraw = True
+
+    def rescale(self):
+        """Fit the range to the samples still shown, e.g. once a spike has
+        scrolled out of the chart."""
+        if self.columns and not self.fixed:
+            self._rescale()
+            self.changed = True
+
+    def _y(self, value):
+        h = self.h - 1
+        y = h - int((value - self.lo) * h / (self.hi - self.lo) + 0.5)
+        return 0 if y < 0 else h if y > h else y
+
+    def _draw_column(self, age, fg, band, bg):
+        """Draw the column ``age`` steps before the newest one."""
+        fb = self._fb
+        x = self.w - 1 - age
+        column = (self._head - age) % self.w
+        fb.vline(x, 0, self.h, bg)
+        top = self._y(self.maxs[column])
+        fb.vline(x, top, self._y(self.mins[column]) - top + 1, band)
+        y = self._y(self.lasts[column])
+        if age + 1 < self.columns:
+            prev = self._y(self.lasts[(column - 1) % self.w])
+            fb.vline(x, min(y, prev), abs(y - prev) + 1, fg)
+        else:
+            fb.pixel(x, y, fg)
+
+    def draw(self, fb, color, background):
+        fg = color & 3
+        bg = background & 3
+        band = self.band_color
+        if band is None:
+            # the gray next to the background on the way to the line colour
+            a = RAMP.index(bg)
+            b = RAMP.index(fg)
+            band = bg if a == b else RAMP[a + 1 if b > a else a - 1]
+        else:
+            band &= 3
+        if self._colors != (fg, band, bg):
+            self._colors = (fg, band, bg)
+            self._redraw = True
+        shift = self._shift
+        if self._redraw or shift >= self.w:
+            self._fb.fill(bg)
+            count = self.columns
+        else:
+            if shift:
+                self._fb.scroll(-shift, 0)
+            # the previous newest column may have gained samples
+            count = min(shift + 1, self.columns)
+            if shift and self.columns == self.w:
+                # the oldest column lost its predecessor, no line into it
+                self._draw_column(self.w - 1, fg, band, bg)
+        for age in range(count):
+            self._draw_column(age, fg, band, bg)
+        self._shift = 0
+        self._redraw = False
+        fb.blit(self._fb, self.x, self.y)
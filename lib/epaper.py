@@ -28,8 +28,22 @@
 #
 
 from machine import Pin, SPI
+from array import array
 import framebuf
+import gc
 import utime
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+try:
+    from binascii import crc32
+except ImportError:
+    try:
+        from ubinascii import crc32
+    except ImportError:
+        crc32 = None
+from epdcodec import encode_4gray, transpose_pages, GRAY_OLD_HI, GRAY_OLD_LO, GRAY_NEW_HI, GRAY_NEW_LO, MONO_HI, MONO_LO
 
 # Display resolution
 EPD_WIDTH       = 176
@@ -40,105 +54,213 @@ DC_PIN          = 8
 CS_PIN          = 9
 BUSY_PIN        = 13
 
-EPD_2in7_lut_vcom_dc = [
-    0x00,0x00,
-    0x00,0x08,0x00,0x00,0x00,0x02,
-    0x60,0x28,0x28,0x00,0x00,0x01,
-    0x00,0x14,0x00,0x00,0x00,0x01,
-    0x00,0x12,0x12,0x00,0x00,0x01,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-    0x00,0x00,0x00,0x00,0x00,0x00
-]
-EPD_2in7_lut_ww = [
-    0x40,0x08,0x00,0x00,0x00,0x02,
-    0x90,0x28,0x28,0x00,0x00,0x01,
-    0x40,0x14,0x00,0x00,0x00,0x01,
-    0xA0,0x12,0x12,0x00,0x00,0x01,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-]
-EPD_2in7_lut_bw = [
-    0x40,0x08,0x00,0x00,0x00,0x02,
-    0x90,0x28,0x28,0x00,0x00,0x01,
-    0x40,0x14,0x00,0x00,0x00,0x01,
-    0xA0,0x12,0x12,0x00,0x00,0x01,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-]
-EPD_2in7_lut_bb = [
-    0x80,0x08,0x00,0x00,0x00,0x02,
-    0x90,0x28,0x28,0x00,0x00,0x01,
-    0x80,0x14,0x00,0x00,0x00,0x01,
-    0x50,0x12,0x12,0x00,0x00,0x01,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-]
-EPD_2in7_lut_wb = [
-    0x80,0x08,0x00,0x00,0x00,0x02,
-    0x90,0x28,0x28,0x00,0x00,0x01,
-    0x80,0x14,0x00,0x00,0x00,0x01,
-    0x50,0x12,0x12,0x00,0x00,0x01,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-    0x00,0x00,0x00,0x00,0x00,0x00,
-]
+# Framebuffer modes, allocated on first use
+MODE_4GRAY           = 0
+MODE_1GRAY_PORTRAIT  = 1
+MODE_1GRAY_LANDSCAPE = 2
+
+EPD_2in7_lut_vcom_dc = (
+    b'\x00\x00'
+    b'\x00\x08\x00\x00\x00\x02'
+    b'\x60\x28\x28\x00\x00\x01'
+    b'\x00\x14\x00\x00\x00\x01'
+    b'\x00\x12\x12\x00\x00\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
+EPD_2in7_lut_ww = (
+    b'\x40\x08\x00\x00\x00\x02'
+    b'\x90\x28\x28\x00\x00\x01'
+    b'\x40\x14\x00\x00\x00\x01'
+    b'\xa0\x12\x12\x00\x00\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
+EPD_2in7_lut_bw = (
+    b'\x40\x08\x00\x00\x00\x02'
+    b'\x90\x28\x28\x00\x00\x01'
+    b'\x40\x14\x00\x00\x00\x01'
+    b'\xa0\x12\x12\x00\x00\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
+EPD_2in7_lut_bb = (
+    b'\x80\x08\x00\x00\x00\x02'
+    b'\x90\x28\x28\x00\x00\x01'
+    b'\x80\x14\x00\x00\x00\x01'
+    b'\x50\x12\x12\x00\x00\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
+EPD_2in7_lut_wb = (
+    b'\x80\x08\x00\x00\x00\x02'
+    b'\x90\x28\x28\x00\x00\x01'
+    b'\x80\x14\x00\x00\x00\x01'
+    b'\x50\x12\x12\x00\x00\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
 
 # # # # # # # # # # # # # # # # # # # full screen update LUT# # # # # # # # # # # # # # # # # # # # # # 
 # 0~3 gray
-EPD_2in7_gray_lut_vcom =[
-0x00,0x00,
-0x00,0x0A,0x00,0x00,0x00,0x01,
-0x60,0x14,0x14,0x00,0x00,0x01,
-0x00,0x14,0x00,0x00,0x00,0x01,
-0x00,0x13,0x0A,0x01,0x00,0x01,
-0x00,0x00,0x00,0x00,0x00,0x00,
-0x00,0x00,0x00,0x00,0x00,0x00,
-0x00,0x00,0x00,0x00,0x00,0x00,
-]
+EPD_2in7_gray_lut_vcom = (
+    b'\x00\x00'
+    b'\x00\x0a\x00\x00\x00\x01'
+    b'\x60\x14\x14\x00\x00\x01'
+    b'\x00\x14\x00\x00\x00\x01'
+    b'\x00\x13\x0a\x01\x00\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
 # R21
-EPD_2in7_gray_lut_ww =[
-0x40,0x0A,0x00,0x00,0x00,0x01,
-0x90,0x14,0x14,0x00,0x00,0x01,
-0x10,0x14,0x0A,0x00,0x00,0x01,
-0xA0,0x13,0x01,0x00,0x00,0x01,
-0x00,0x00,0x00,0x00,0x00,0x00,
-0x00,0x00,0x00,0x00,0x00,0x00,
-0x00,0x00,0x00,0x00,0x00,0x00,
-]
+EPD_2in7_gray_lut_ww = (
+    b'\x40\x0a\x00\x00\x00\x01'
+    b'\x90\x14\x14\x00\x00\x01'
+    b'\x10\x14\x0a\x00\x00\x01'
+    b'\xa0\x13\x01\x00\x00\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
 # R22Hr
-EPD_2in7_gray_lut_bw =[
-0x40,0x0A,0x00,0x00,0x00,0x01,
-0x90,0x14,0x14,0x00,0x00,0x01,
-0x00,0x14,0x0A,0x00,0x00,0x01,
-0x99,0x0C,0x01,0x03,0x04,0x01,
-0x00,0x00,0x00,0x00,0x00,0x00,
-0x00,0x00,0x00,0x00,0x00,0x00,
-0x00,0x00,0x00,0x00,0x00,0x00,
-]
+EPD_2in7_gray_lut_bw = (
+    b'\x40\x0a\x00\x00\x00\x01'
+    b'\x90\x14\x14\x00\x00\x01'
+    b'\x00\x14\x0a\x00\x00\x01'
+    b'\x99\x0c\x01\x03\x04\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
 # R23Hw
-EPD_2in7_gray_lut_wb =[
-0x40,0x0A,0x00,0x00,0x00,0x01,
-0x90,0x14,0x14,0x00,0x00,0x01,
-0x00,0x14,0x0A,0x00,0x00,0x01,
-0x99,0x0B,0x04,0x04,0x01,0x01,
-0x00,0x00,0x00,0x00,0x00,0x00,
-0x00,0x00,0x00,0x00,0x00,0x00,
-0x00,0x00,0x00,0x00,0x00,0x00,
-]
+EPD_2in7_gray_lut_wb = (
+    b'\x40\x0a\x00\x00\x00\x01'
+    b'\x90\x14\x14\x00\x00\x01'
+    b'\x00\x14\x0a\x00\x00\x01'
+    b'\x99\x0b\x04\x04\x01\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
 # R24Hb
-EPD_2in7_gray_lut_bb =[
-0x80,0x0A,0x00,0x00,0x00,0x01,
-0x90,0x14,0x14,0x00,0x00,0x01,
-0x20,0x14,0x0A,0x00,0x00,0x01,
-0x50,0x13,0x01,0x00,0x00,0x01,
-0x00,0x00,0x00,0x00,0x00,0x00,
-0x00,0x00,0x00,0x00,0x00,0x00,
-0x00,0x00,0x00,0x00,0x00,0x00,
-]
+EPD_2in7_gray_lut_bb = (
+    b'\x80\x0a\x00\x00\x00\x01'
+    b'\x90\x14\x14\x00\x00\x01'
+    b'\x20\x14\x0a\x00\x00\x01'
+    b'\x50\x13\x01\x00\x00\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
+
+# # # # # # # # # # # # # # # # # # # fast 1-bit update LUT# # # # # # # # # # # # # # # # # # # # # # 
+# Single short phase that only drives pixels whose bit changed between the
+# old (0x10) and new (0x13) plane, no full-screen flashing
+EPD_2in7_fast_lut_vcom = (
+    b'\x00\x00'
+    b'\x00\x19\x01\x00\x00\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
+# white -> white, black -> black: no drive
+EPD_2in7_fast_lut_keep = (
+    b'\x00\x19\x01\x00\x00\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
+# black -> white
+EPD_2in7_fast_lut_bw = (
+    b'\x80\x19\x01\x00\x00\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
+# white -> black
+EPD_2in7_fast_lut_wb = (
+    b'\x40\x19\x01\x00\x00\x01'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00'
+)
+
+# Refresh profiles for display()/EPD_2IN7_4Gray_Refresh
+PROFILE_4GRAY = '4gray'   # 4-gray waveform, partial windows
+PROFILE_MONO  = 'mono'    # fast 1-bit waveform, 4-gray refresh for cleanup
+
+def _sleep_ms(ms):
+    if hasattr(asyncio, 'sleep_ms'):
+        return asyncio.sleep_ms(ms)
+    return asyncio.sleep(ms / 1000)
+
+# Init sequences packed as (command, length, data...) records for
+# send_script. Each is split around POWER_ON (0x04) and its BUSY wait.
+def _script(*records):
+    out = bytearray()
+    for command, data in records:
+        out.append(command)
+        out.append(len(data))
+        out += data
+    return bytes(out)
+
+_POWER_OPTIMIZATION = (
+    (0xF8, b'\x60\xA5'),
+    (0xF8, b'\x89\xA5'),
+    (0xF8, b'\x90\x00'),
+    (0xF8, b'\x93\x2A'),
+    (0xF8, b'\xA0\xA5'),
+    (0xF8, b'\xA1\x00'),
+    (0xF8, b'\x73\x41'),
+)
+
+EPD_2in7_init_mono = (
+    _script(
+        (0x01, b'\x03\x00\x2b\x2b\x09'),  # POWER_SETTING: VDS_EN VDG_EN, VCOM_HV VGHL_LV, VDH, VDL, VDHR
+        (0x06, b'\x07\x07\x17'),  # BOOSTER_SOFT_START
+        *_POWER_OPTIMIZATION,
+        (0x16, b'\x00'),  # PARTIAL_DISPLAY_REFRESH
+    ),
+    _script(
+        (0x00, b'\xAF'),  # PANEL_SETTING  KW-BF   KWR-AF    BWROTP 0f
+        (0x30, b'\x3A'),  # PLL_CONTROL  3A 100HZ   29 150Hz 39 200HZ    31 171HZ
+        (0x82, b'\x12'),  # VCM_DC_SETTING_REGISTER
+    ),
+)
+
+EPD_2in7_init_4gray = (
+    _script(
+        (0x01, b'\x03\x00\x2b\x2b'),  # POWER SETTING
+        (0x06, b'\x07\x07\x17'),  # booster soft start A B C
+        *_POWER_OPTIMIZATION,
+        (0x16, b'\x00'),
+    ),
+    _script(
+        (0x00, b'\xbf'),  # panel setting  KW-BF   KWR-AF	BWROTP 0f
+        (0x30, b'\x90'),  # PLL setting  100hz
+        (0x61, b'\x00\xb0\x01\x08'),  # resolution setting 176 x 264
+        (0x82, b'\x12'),  # vcom_DC setting
+        (0X50, b'\x97'),  # VCOM AND DATA INTERVAL SETTING
+    ),
+)
 
 class EPD_2in7:
     def __init__(self):
@@ -170,19 +292,145 @@ class EPD_2in7:
         self.spi = SPI(1)
         self.spi.init(baudrate=4000_000)
         self.dc_pin = Pin(DC_PIN, Pin.OUT)
+        # preallocated SPI scratch: single command/data byte and a fill chunk
+        self._byte = bytearray(1)
+        self._fill = bytearray(256)
+        self._fill_value = 0x00
+        
+        # (buffer, FrameBuffer) per MODE_*, created by the image*/buffer_*
+        # properties on first use and dropped again by release_mode()
+        self._modes = [None, None, None]
+        self._plane = None
+
+        # Optional second 4-gray buffer (see double_buffer): the frame
+        # owned by the refresh in flight, while buffer_4Gray stays drawable
+        self._front = None
+        self._display_lock = None
+        
+        # Partial refresh: union of the regions marked dirty since the last
+        # push as [x0, y0, x1, y1] (x byte aligned), and a full refresh
+        # forced after full_refresh_every partials to clear ghosting.
+        # last_window is the (x, y, w, h) of the last pushed refresh.
+        self._window = bytearray(8)
+        self._dirty = None
+        self.last_window = None
+        self.full_refresh_every = 10
+        self._partial_count = 0
+        self._full_pending = True
+        self.full_refreshes = 0
+        self.partial_refreshes = 0
         
-        self.buffer_1Gray_Landscape = bytearray(self.height * self.width // 8)
-        self.buffer_1Gray_Portrait = bytearray(self.height * self.width // 8)
-        self.buffer_4Gray = bytearray(self.height * self.width // 4)
+        # CRC of every row of the last pushed 4-gray frame; identical frames
+        # are skipped and changed rows bound the partial refresh window.
+        self._row_hashes = array('I', [0] * self.height)
+        self._hashes_valid = False
+        self.frames_pushed = 0
+        self.frames_skipped = 0
         
-        self.image1Gray_Landscape = framebuf.FrameBuffer(self.buffer_1Gray_Landscape, self.height, self.width, framebuf.MONO_VLSB)
-        self.image1Gray_Portrait = framebuf.FrameBuffer(self.buffer_1Gray_Portrait, self.width, self.height, framebuf.MONO_HLSB)
-        self.image4Gray = framebuf.FrameBuffer(self.buffer_4Gray, self.width, self.height, framebuf.GS2_HMSB)
+        # BUSY handling shared by ReadBusy and the awaitable wait_busy
+        self.busy_timeout_ms = 3000
+        self.busy_poll_ms = 100
+        self._busy_flag = None
+        
+        # Refresh profile, last 1-bit frame on the panel (old plane of the
+        # fast waveform) and per kind [count, last ms, total ms]
+        self.profile = PROFILE_4GRAY
+        self._mono_prev = None
+        self._refresh_start = 0
+        self.refresh_stats = {}
+
+        # Power lifecycle: reset pulse (high, low, recover ms) for the init
+        # sequences and for wake(), deep sleep after every refresh with
+        # auto_sleep, and an energy estimate from power_mw per state
+        self.reset_timing = (200, 2, 200)
+        self.wake_reset_timing = (20, 2, 20)
+        self.auto_sleep = False
+        self.asleep = False
+        self._script = None  # init script last sent, replayed by wake()
+        self.power_mw = {'awake': 3.3, 'refresh': 26.4, 'sleep': 0.017}
+        self.power_stats = {}
+        self._power_state = 'awake'
+        self._power_since = utime.ticks_ms()
+        self._energy_mj = 0.0
         
         self.EPD_2IN7_Init_4Gray()
         #self.EPD_2IN7_Clear()
         #utime.sleep_ms(500)
 
+    def _mode_buffers(self, mode):
+        entry = self._modes[mode]
+        if entry is None:
+            if mode == MODE_4GRAY:
+                buf = bytearray(self.height * self.width // 4)
+                image = framebuf.FrameBuffer(buf, self.width, self.height, framebuf.GS2_HMSB)
+            elif mode == MODE_1GRAY_PORTRAIT:
+                buf = bytearray(self.height * self.width // 8)
+                image = framebuf.FrameBuffer(buf, self.width, self.height, framebuf.MONO_HLSB)
+            else:
+                buf = bytearray(self.height * self.width // 8)
+                image = framebuf.FrameBuffer(buf, self.height, self.width, framebuf.MONO_VLSB)
+            entry = (buf, image)
+            self._modes[mode] = entry
+        return entry
+
+    @property
+    def buffer_4Gray(self):
+        return self._mode_buffers(MODE_4GRAY)[0]
+
+    @property
+    def image4Gray(self):
+        return self._mode_buffers(MODE_4GRAY)[1]
+
+    @property
+    def buffer_1Gray_Portrait(self):
+        return self._mode_buffers(MODE_1GRAY_PORTRAIT)[0]
+
+    @property
+    def image1Gray_Portrait(self):
+        return self._mode_buffers(MODE_1GRAY_PORTRAIT)[1]
+
+    @property
+    def buffer_1Gray_Landscape(self):
+        return self._mode_buffers(MODE_1GRAY_LANDSCAPE)[0]
+
+    @property
+    def image1Gray_Landscape(self):
+        return self._mode_buffers(MODE_1GRAY_LANDSCAPE)[1]
+
+    # reusable output for the 0x10/0x13 planes and the landscape transpose
+    @property
+    def buffer_plane(self):
+        if self._plane is None:
+            self._plane = bytearray(self.height * self.width // 8)
+        return self._plane
+
+    # Free the buffers of one MODE_* (all modes if None)
+    def release_mode(self, mode=None):
+        if mode is None:
+            self._modes = [None, None, None]
+        else:
+            self._modes[mode] = None
+        if self._modes[MODE_4GRAY] is None and self._modes[MODE_1GRAY_LANDSCAPE] is None:
+            self._plane = None
+        gc.collect()
+
+    # Bytes held by the framebuffers plus the heap state after a collect
+    def mem_report(self):
+        buffers = 0
+        for entry in self._modes:
+            if entry is not None:
+                buffers += len(entry[0])
+        if self._plane is not None:
+            buffers += len(self._plane)
+        if self._front is not None:
+            buffers += len(self._front[0])
+        gc.collect()
+        report = {'buffers': buffers}
+        if hasattr(gc, 'mem_free'):
+            report['free'] = gc.mem_free()
+            report['alloc'] = gc.mem_alloc()
+        return report
+
     def digital_write(self, pin, value):
         pin.value(value)
 
@@ -198,222 +446,226 @@ class EPD_2in7:
     def module_exit(self):
         self.digital_write(self.reset_pin, 0)
 
-    # Hardware reset
-    def reset(self):
+    # Hardware reset, timing (high, low, recover ms) defaults to reset_timing
+    def reset(self, timing=None):
+        high, low, recover = timing or self.reset_timing
         self.digital_write(self.reset_pin, 1)
-        self.delay_ms(200) 
+        self.delay_ms(high)
         self.digital_write(self.reset_pin, 0)
-        self.delay_ms(2)
+        self.delay_ms(low)
         self.digital_write(self.reset_pin, 1)
-        self.delay_ms(200)   
+        self.delay_ms(recover)
 
     def send_command(self, command):
+        self._byte[0] = command
         self.digital_write(self.dc_pin, 0)
         self.digital_write(self.cs_pin, 0)
-        self.spi_writebyte([command])
+        self.spi.write(self._byte)
         self.digital_write(self.cs_pin, 1)
 
     def send_data(self, data):
+        self._byte[0] = data
+        self.digital_write(self.dc_pin, 1)
+        self.digital_write(self.cs_pin, 0)
+        self.spi.write(self._byte)
+        self.digital_write(self.cs_pin, 1)
+
+    # Stream buf[start:end] as data in one CS-low transaction
+    def send_data_buffer(self, buf, start=0, end=None):
+        if end is None:
+            end = len(buf)
         self.digital_write(self.dc_pin, 1)
         self.digital_write(self.cs_pin, 0)
-        self.spi_writebyte([data])
+        self.spi.write(memoryview(buf)[start:end])
         self.digital_write(self.cs_pin, 1)
+
+    # Stream count copies of value as data in one CS-low transaction
+    def send_data_repeat(self, value, count):
+        fill = self._fill
+        if self._fill_value != value:
+            for i in range(len(fill)):
+                fill[i] = value
+            self._fill_value = value
+        self.digital_write(self.dc_pin, 1)
+        self.digital_write(self.cs_pin, 0)
+        while count > 0:
+            n = min(count, len(fill))
+            self.spi.write(memoryview(fill)[0:n])
+            count -= n
+        self.digital_write(self.cs_pin, 1)
+
+    def send_command_data(self, command, data):
+        self.send_command(command)
+        self.send_data_buffer(data)
+
+    # Replay packed (command, length, data...) records, see _script
+    def send_script(self, script):
+        mv = memoryview(script)
+        i = 0
+        end = len(script)
+        while i < end:
+            length = script[i + 1]
+            self.send_command(script[i])
+            if length:
+                self.send_data_buffer(mv, i + 2, i + 2 + length)
+            i += 2 + length
+
+    # Stream rows of length bytes, stride bytes apart, in one CS-low transaction
+    def send_data_rows(self, buf, start, stride, length, rows):
+        if length == stride:
+            self.send_data_buffer(buf, start, start + length * rows)
+            return
+        mv = memoryview(buf)
+        self.digital_write(self.dc_pin, 1)
+        self.digital_write(self.cs_pin, 0)
+        for r in range(rows):
+            self.spi.write(mv[start:start + length])
+            start += stride
+        self.digital_write(self.cs_pin, 1)
+
+    # Command followed by the X, Y, W, L window parameters of the partial commands
+    def send_window(self, command, x, y, w, h):
+        window = self._window
+        window[0] = x >> 8
+        window[1] = x & 0xf8
+        window[2] = y >> 8
+        window[3] = y & 0xff
+        window[4] = w >> 8
+        window[5] = w & 0xf8
+        window[6] = h >> 8
+        window[7] = h & 0xff
+        self.send_command_data(command, window)
         
     def ReadBusy(self):
         print("e-Paper busy")
-        timeout_ms = 3000  # max wait time = 5 seconds
+        timeout_ms = self.busy_timeout_ms
         start_time = utime.ticks_ms()
 
         while self.digital_read(self.busy_pin) == 1:
             if utime.ticks_diff(utime.ticks_ms(), start_time) > timeout_ms:
-                self.reset()
-                self.__init__()
-                raise OSError("E-Paper Busy Timeout!")
-            utime.sleep_ms(100)
+                self._busy_timeout()
+            utime.sleep_ms(self.busy_poll_ms)
         print("e-Paper busy release")
+
+    # Re-initialise only the controller in the current profile: buffers and
+    # settings stay, the next refresh is a full one. BUSY is polled once up
+    # to busy_timeout_ms, so a stuck panel cannot recurse into here.
+    def _busy_timeout(self):
+        script = self._init_script()
+        self.reset()
+        self._full_pending = True
+        self._hashes_valid = False
+        self._power_on(script)
+        start_time = utime.ticks_ms()
+        while (self.digital_read(self.busy_pin) == 1
+               and utime.ticks_diff(utime.ticks_ms(), start_time) < self.busy_timeout_ms):
+            utime.sleep_ms(self.busy_poll_ms)
+        self._power_on_done(script)
+        raise OSError("E-Paper Busy Timeout!")
+
+    def _busy_irq(self, pin):
+        self._busy_flag.set()
+
+    # Awaitable ReadBusy: waits settle_ms for BUSY to assert, then for its
+    # falling edge (pin IRQ where asyncio.ThreadSafeFlag exists, polling
+    # otherwise) while other tasks keep running
+    async def wait_busy(self, settle_ms=0, timeout_ms=None):
+        if timeout_ms is None:
+            timeout_ms = self.busy_timeout_ms
+        if settle_ms:
+            await _sleep_ms(settle_ms)
+        use_irq = hasattr(asyncio, 'ThreadSafeFlag') and hasattr(self.busy_pin, 'irq')
+        if use_irq:
+            if self._busy_flag is None:
+                self._busy_flag = asyncio.ThreadSafeFlag()
+            self.busy_pin.irq(handler=self._busy_irq, trigger=Pin.IRQ_FALLING)
+        start_time = utime.ticks_ms()
+        try:
+            while self.digital_read(self.busy_pin) == 1:
+                remaining = timeout_ms - utime.ticks_diff(utime.ticks_ms(), start_time)
+                if remaining <= 0:
+                    self._busy_timeout()
+                if use_irq:
+                    try:
+                        await asyncio.wait_for_ms(self._busy_flag.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await _sleep_ms(min(remaining, self.busy_poll_ms))
+        finally:
+            if use_irq:
+                self.busy_pin.irq(handler=None)
         
     def SetLut(self):
-        self.send_command(0x20)
-        for count in range(0, 44):
-            self.send_data(self.lut_vcom_dc[count])
-            
-        self.send_command(0x21)
-        for count in range(0, 42):
-            self.send_data(self.lut_ww[count])
-        
-        self.send_command(0x22)
-        for count in range(0, 42):
-            self.send_data(self.lut_bw[count])
-            
-        self.send_command(0x23)
-        for count in range(0, 42):
-            self.send_data(self.lut_bb[count])
-            
-        self.send_command(0x24)
-        for count in range(0, 42):
-            self.send_data(self.lut_wb[count])
+        self.send_command_data(0x20, self.lut_vcom_dc)
+        self.send_command_data(0x21, self.lut_ww)
+        self.send_command_data(0x22, self.lut_bw)
+        self.send_command_data(0x23, self.lut_bb)
+        self.send_command_data(0x24, self.lut_wb)
             
     def gray_SetLut(self):
-        self.send_command(0x20)
-        for count in range(0, 44):
-            self.send_data(self.gray_lut_vcom[count])
-            
-        self.send_command(0x21)
-        for count in range(0, 42):
-            self.send_data(self.gray_lut_ww[count])
-        
-        self.send_command(0x22)
-        for count in range(0, 42):
-            self.send_data(self.gray_lut_bw[count])
-            
-        self.send_command(0x23)
-        for count in range(0, 42):
-            self.send_data(self.gray_lut_wb[count])
-            
-        self.send_command(0x24)
-        for count in range(0, 42):
-            self.send_data(self.gray_lut_bb[count])
-            
-        self.send_command(0x25)
-        for count in range(0, 42):
-            self.send_data(self.gray_lut_ww[count])
+        self.send_command_data(0x20, self.gray_lut_vcom)
+        self.send_command_data(0x21, self.gray_lut_ww)
+        self.send_command_data(0x22, self.gray_lut_bw)
+        self.send_command_data(0x23, self.gray_lut_wb)
+        self.send_command_data(0x24, self.gray_lut_bb)
+        self.send_command_data(0x25, self.gray_lut_ww)
+
+    def fast_SetLut(self):
+        self.send_command_data(0x20, EPD_2in7_fast_lut_vcom)
+        self.send_command_data(0x21, EPD_2in7_fast_lut_keep)
+        self.send_command_data(0x22, EPD_2in7_fast_lut_bw)
+        self.send_command_data(0x23, EPD_2in7_fast_lut_wb)
+        self.send_command_data(0x24, EPD_2in7_fast_lut_keep)
             
         
     def EPD_2IN7_Init(self):
-    
-        self.reset();
-
-        self.send_command(0x01)  # POWER_SETTING
-        self.send_data(0x03)  # VDS_EN, VDG_EN
-        self.send_data(0x00)  # VCOM_HV, VGHL_LV[1], VGHL_LV[0]
-        self.send_data(0x2b)  # VDH
-        self.send_data(0x2b)  # VDL
-        self.send_data(0x09)  # VDHR
-        
-        self.send_command(0x06)  # BOOSTER_SOFT_START
-        self.send_data(0x07)
-        self.send_data(0x07)
-        self.send_data(0x17)
-        
-        # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x60)
-        self.send_data(0xA5)
-        
-        # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x89)
-        self.send_data(0xA5)
-            
-        # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x90)
-        self.send_data(0x00)
-            
-        # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x93)
-        self.send_data(0x2A)
-            
-        # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0xA0)
-        self.send_data(0xA5)
-            
-        # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0xA1)
-        self.send_data(0x00)
-            
-        # Power optimization
-        self.send_command(0xF8)
-        self.send_data(0x73)
-        self.send_data(0x41)
-            
-        self.send_command(0x16)  # PARTIAL_DISPLAY_REFRESH
-        self.send_data(0x00)
-            
-        self.send_command(0x04)  # POWER_ON
-        self.ReadBusy();
-
-        self.send_command(0x00)  # PANEL_SETTING
-        self.send_data(0xAF)  # KW-BF   KWR-AF    BWROTP 0f
-        self.send_command(0x30)  #  PLL_CONTROL
-        self.send_data(0x3A)  # 3A 100HZ   29 150Hz 39 200HZ    31 171HZ
-        self.send_command(0x82)  # VCM_DC_SETTING_REGISTER
-        self.send_data(0x12)
-
-        self.SetLut()
+        self._init_start(EPD_2in7_init_mono)
+        self.ReadBusy()
+        self._power_on_done(EPD_2in7_init_mono)
 
     def EPD_2IN7_Init_4Gray(self):
-        
-        self.reset()
-        
-        self.send_command(0x01)  # POWER SETTING
-        self.send_data (0x03)
-        self.send_data (0x00)   
-        self.send_data (0x2b)
-        self.send_data (0x2b)
-
-
-        self.send_command(0x06)  # booster soft start
-        self.send_data (0x07)  # A
-        self.send_data (0x07)  # B
-        self.send_data (0x17)  # C 
-
-        self.send_command(0xF8)  # boost??
-        self.send_data (0x60)
-        self.send_data (0xA5)
-
-        self.send_command(0xF8)  # boost??
-        self.send_data (0x89)
-        self.send_data (0xA5)
-
-        self.send_command(0xF8)  # boost??
-        self.send_data (0x90)
-        self.send_data (0x00)
-
-        self.send_command(0xF8)  # boost??
-        self.send_data (0x93)
-        self.send_data (0x2A)
-
-        self.send_command(0xF8)  # boost??
-        self.send_data (0xa0)
-        self.send_data (0xa5)
-
-        self.send_command(0xF8)  # boost??
-        self.send_data (0xa1)
-        self.send_data (0x00)
-
-        self.send_command(0xF8)  # boost??
-        self.send_data (0x73)
-        self.send_data (0x41)
+        self._init_start(EPD_2in7_init_4gray)
+        self.ReadBusy()
+        self._power_on_done(EPD_2in7_init_4gray)
 
-        self.send_command(0x16)
-        self.send_data(0x00)
+    # Awaitable EPD_2IN7_Init and EPD_2IN7_Init_4Gray: the reset delays and
+    # the BUSY wait of POWER_ON let other tasks run
+    async def EPD_2IN7_Init_async(self):
+        await self._init_async(EPD_2in7_init_mono)
 
-        self.send_command(0x04)
-        self.ReadBusy()
+    async def EPD_2IN7_Init_4Gray_async(self):
+        await self._init_async(EPD_2in7_init_4gray)
 
-        self.send_command(0x00)  # panel setting
-        self.send_data(0xbf)  # KW-BF   KWR-AF	BWROTP 0f
+    def _init_start(self, script):
+        self.reset()
+        self._full_pending = True
+        self._hashes_valid = False
+        self._power_on(script)
 
-        self.send_command(0x30)  # PLL setting
-        self.send_data (0x90)  # 100hz 
+    async def _init_async(self, script):
+        await self._reset_async(self.reset_timing)
+        self._full_pending = True
+        self._hashes_valid = False
+        self._power_on(script)
+        await self.wait_busy()
+        self._power_on_done(script)
 
-        self.send_command(0x61)  # resolution setting
-        self.send_data (0x00)  # 176
-        self.send_data (0xb0)
-        self.send_data (0x01)  # 264
-        self.send_data (0x08)
+    # First half of an init script and POWER_ON, the caller waits for BUSY
+    def _power_on(self, script):
+        self._script = script
+        self.send_script(script[0])
+        self.send_command(0x04)  # POWER_ON
 
-        self.send_command(0x82)  # vcom_DC setting
-        self.send_data (0x12)
+    def _power_on_done(self, script):
+        self.send_script(script[1])
+        if script is EPD_2in7_init_mono:
+            self.SetLut()
+        self.asleep = False
+        self._power('awake')
 
-        self.send_command(0X50)  # VCOM AND DATA INTERVAL SETTING			
-        self.send_data(0x97)
-            
     def EPD_2IN7_Clear(self):
+        self._direct_start()
         high = self.height
         if( self.width % 8 == 0) :
             wide =  self.width // 8
@@ -421,18 +673,15 @@ class EPD_2in7:
             wide =  self.width // 8 + 1
 
         self.send_command(0x10)
-        for j in range(0, high):
-            for i in range(0, wide):
-                self.send_data(0xff)
+        self.send_data_repeat(0xff, wide * high)
                 
         self.send_command(0x13)
-        for j in range(0, high):
-            for i in range(0, wide):
-                self.send_data(0xff)
+        self.send_data_repeat(0xff, wide * high)
 
         
         self.send_command(0x12)
         self.ReadBusy()
+        self._direct_done()
 
     def EPD_2IN7_Display_Portrait(self,Image):
         high = self.height
@@ -442,17 +691,14 @@ class EPD_2in7:
             wide =  self.width // 8 + 1
 
         self.send_command(0x10)
-        for j in range(0, high):
-            for i in range(0, wide):
-                self.send_data(0xff)
+        self.send_data_repeat(0xff, wide * high)
                 
         self.send_command(0x13)
-        for j in range(0, high):
-            for i in range(0, wide):
-                self.send_data(Image[i + j * wide])
+        self.send_data_buffer(Image, 0, wide * high)
 
     
     def EPD_2IN7_Display_Landscape(self,Image):
+        self._direct_start()
         high = self.height
         if( self.width % 8 == 0) :
             wide =  self.width // 8
@@ -460,105 +706,432 @@ class EPD_2in7:
             wide =  self.width // 8 + 1
 
         self.send_command(0x10)
-        for j in range(0, high):
-            for i in range(0, wide):
-                self.send_data(0xff)
+        self.send_data_repeat(0xff, wide * high)
                 
+        plane = self.buffer_plane
+        transpose_pages(Image, plane, wide, high)
         self.send_command(0x13)
-        for j in range(0, high):
-            for i in range(0, wide):
-                self.send_data(Image[(21-i) * high + j])
+        self.send_data_buffer(plane, 0, wide * high)
 
         
         self.send_command(0x12)
         self.ReadBusy()
+        self._direct_done()
         
-    def EPD_2IN7_4Gray_Display(self,Image):
-        
+    # Transfer both planes and start the 4-gray refresh without waiting
+    def _start_4Gray(self, Image):
+        plane = self.buffer_plane
+
+        encode_4gray(Image, plane, GRAY_OLD_HI, GRAY_OLD_LO)
         self.send_command(0x10)
-        for i in range(0, 5808):
-            temp3=0
-            for j in range(0, 2):
-                temp1 = Image[i*2+j]
-                for k in range(0, 2):
-                    temp2 = temp1&0x03 
-                    if(temp2 == 0x03):
-                        temp3 |= 0x01   # white
-                    elif(temp2 == 0x00):
-                        temp3 |= 0x00   # black
-                    elif(temp2 == 0x02):
-                        temp3 |= 0x00   # gray1
-                    else:   # 0x01
-                        temp3 |= 0x01   # gray2
-                    temp3 <<= 1
-
-                    temp1 >>= 2
-                    temp2 = temp1&0x03 
-                    if(temp2 == 0x03):   # white
-                        temp3 |= 0x01;
-                    elif(temp2 == 0x00):   # black
-                        temp3 |= 0x00;
-                    elif(temp2 == 0x02):
-                        temp3 |= 0x00   # gray1
-                    else:   # 0x01
-                        temp3 |= 0x01   # gray2
-                    
-                    if (( j!=1 ) | ( k!=1 )):
-                        temp3 <<= 1
-
-                    temp1 >>= 2
-                    
-            self.send_data(temp3)
-        
+        self.send_data_buffer(plane)
+
+        encode_4gray(Image, plane, GRAY_NEW_HI, GRAY_NEW_LO)
         self.send_command(0x13)
-        for i in range(0, 5808):
-            temp3=0
-            for j in range(0, 2):
-                temp1 = Image[i*2+j]
-                for k in range(0, 2):
-                    temp2 = temp1&0x03 
-                    if(temp2 == 0x03):
-                        temp3 |= 0x01   # white
-                    elif(temp2 == 0x00):
-                        temp3 |= 0x00   # black
-                    elif(temp2 == 0x02):
-                        temp3 |= 0x01   # gray1
-                    else:   # 0x01
-                        temp3 |= 0x00   # gray2
-                    temp3 <<= 1
-
-                    temp1 >>= 2
-                    temp2 = temp1&0x03
-                    if(temp2 == 0x03):   # white
-                        temp3 |= 0x01;
-                    elif(temp2 == 0x00):   # black
-                        temp3 |= 0x00;
-                    elif(temp2 == 0x02):
-                        temp3 |= 0x01   # gray1
-                    else:   # 0x01
-                        temp3 |= 0x00   # gray2
-                    
-                    if (( j!=1 ) | ( k!=1 )):
-                        temp3 <<= 1
-
-                    temp1 >>= 2
-
-            self.send_data(temp3)
+        self.send_data_buffer(plane)
         
         self.gray_SetLut()
         
         self.send_command(0x12)
+        self._refresh_start = utime.ticks_ms()
+
+    def _done_4Gray(self):
+        self._full_pending = False
+        self._partial_count = 0
+        self._dirty = None
+        self.full_refreshes += 1
+        self._record('full')
+
+    # Duration from the refresh command to BUSY release, per kind
+    def _record(self, kind):
+        elapsed = utime.ticks_diff(utime.ticks_ms(), self._refresh_start)
+        stats = self.refresh_stats.get(kind)
+        if stats is None:
+            self.refresh_stats[kind] = [1, elapsed, elapsed]
+        else:
+            stats[0] += 1
+            stats[1] = elapsed
+            stats[2] += elapsed
+
+    # The direct displays wake the controller and put it back to sleep like
+    # EPD_2IN7_4Gray_Refresh. They bypass changed_rows, so the row hashes no
+    # longer describe the panel and the next refresh compares nothing.
+    def _direct_start(self):
+        if self.asleep:
+            self.wake()
+
+    def _direct_done(self):
+        self._hashes_valid = False
+        if self.auto_sleep:
+            self.Sleep()
+
+    def EPD_2IN7_4Gray_Display(self,Image):
+        self._direct_start()
+        self._start_4Gray(Image)
         self.delay_ms(500)
         
         self.ReadBusy()
+        self._done_4Gray()
+        self._direct_done()
+
+    # Transfer the window x, y, w, h (x and w are widened to multiples of 8)
+    # and start its partial refresh without waiting
+    def _start_partial(self, Image, x, y, w, h):
+        wide = self.width // 8
+        x1 = (x + w + 7) & ~7
+        x &= ~7
+        w = x1 - x
+        plane = self.buffer_plane
+        start = y * wide + x // 8
+        end = (y + h) * wide
+        length = w // 8
+
+        for hi, lo, command in ((GRAY_OLD_HI, GRAY_OLD_LO, 0x14),
+                                (GRAY_NEW_HI, GRAY_NEW_LO, 0x15)):
+            for row in range(start, end, wide):
+                encode_4gray(Image, plane, hi, lo, row, row + length)
+            self.send_window(command, x, y, w, h)
+            self.send_data_rows(plane, start, wide, length, h)
+
+        self.gray_SetLut()
+
+        self.send_window(0x16, x, y, w, h)
+        self._refresh_start = utime.ticks_ms()
+
+    def _done_partial(self):
+        self._partial_count += 1
+        self.partial_refreshes += 1
+        self._record('partial')
+
+    # Send New (panel-order 1-bit plane) against the last frame and start a
+    # fast refresh; only pixels that changed colour are driven
+    def _start_mono(self, New):
+        self.send_command(0x10)
+        self.send_data_buffer(self._mono_prev)
+        self.send_command(0x13)
+        self.send_data_buffer(New, 0, len(self._mono_prev))
+        self.fast_SetLut()
+        self.send_command(0x12)
+        self._refresh_start = utime.ticks_ms()
+
+    def _done_mono(self, New):
+        self._mono_prev[:] = memoryview(New)[0:len(self._mono_prev)]
+        self._partial_count += 1
+        self._record('mono')
+
+    # Fast 1-bit refresh of a portrait MONO_HLSB image (buffer_1Gray_Portrait)
+    # after EPD_2IN7_Init; the first frame uses the full mono waveform
+    def EPD_2IN7_Display_Fast(self, Image):
+        self._direct_start()
+        if self._mono_prev is None or self._full_pending:
+            self.EPD_2IN7_Display_Portrait(Image)
+            self.SetLut()
+            self.send_command(0x12)
+            self._refresh_start = utime.ticks_ms()
+            self.delay_ms(100)
+            self.ReadBusy()
+            if self._mono_prev is None:
+                self._mono_prev = bytearray(self.height * self.width // 8)
+            self._full_pending = False
+            self._done_mono(Image)
+            self._direct_done()
+            return
+        self._start_mono(Image)
+        self.delay_ms(100)
+        self.ReadBusy()
+        self._done_mono(Image)
+        self._direct_done()
+
+    # Switch between PROFILE_4GRAY and PROFILE_MONO; the first refresh after
+    # a switch is a full 4-gray one
+    def set_profile(self, profile):
+        if profile == self.profile:
+            return
+        self.profile = profile
+        if profile == PROFILE_MONO:
+            self.EPD_2IN7_Init()
+        else:
+            self.EPD_2IN7_Init_4Gray()
+
+    # Re-enter the fast 1-bit mode after a 4-gray cleanup of Image
+    def _enter_mono(self, Image):
+        self.EPD_2IN7_Init()
+        self._mono_shown(Image)
+
+    # After EPD_2IN7_Init: Image is on the panel, the next 1-bit refresh can
+    # be a fast one against it
+    def _mono_shown(self, Image):
+        if self._mono_prev is None:
+            self._mono_prev = bytearray(self.height * self.width // 8)
+        encode_4gray(Image, self._mono_prev, MONO_HI, MONO_LO)
+        self._full_pending = False
+        self._hashes_valid = True
+
+    # Refresh only the window x, y, w, h (x and w are widened to multiples of 8)
+    def EPD_2IN7_4Gray_Display_Partial(self, Image, x, y, w, h):
+        self._direct_start()
+        self._start_partial(Image, x, y, w, h)
+        self.delay_ms(100)
+
+        self.ReadBusy()
+        self._done_partial()
+        self._direct_done()
+
+    # Add a changed region; the marked columns narrow the window of the next
+    # partial EPD_2IN7_4Gray_Refresh, its rows come from the frame hashes
+    def mark_dirty(self, x, y, w, h):
+        x0 = max(0, x) & ~7
+        y0 = max(0, y)
+        x1 = min(self.width, (x + w + 7) & ~7)
+        y1 = min(self.height, y + h)
+        if x0 >= x1 or y0 >= y1:
+            return
+        dirty = self._dirty
+        if dirty is None:
+            self._dirty = [x0, y0, x1, y1]
+        else:
+            dirty[0] = min(dirty[0], x0)
+            dirty[1] = min(dirty[1], y0)
+            dirty[2] = max(dirty[2], x1)
+            dirty[3] = max(dirty[3], y1)
+
+    # Update the row hashes from Image and return the changed rows as
+    # (first, last + 1), or None when the frame is identical to the last one
+    def changed_rows(self, Image):
+        hashes = self._row_hashes
+        valid = self._hashes_valid
+        stride = self.width // 4
+        mv = memoryview(Image)
+        first = -1
+        last = -1
+        start = 0
+        for row in range(self.height):
+            if crc32 is not None:
+                h = crc32(mv[start:start + stride])
+            else:
+                h = hash(bytes(mv[start:start + stride])) & 0xffffffff
+            if not valid or hashes[row] != h:
+                hashes[row] = h
+                if first < 0:
+                    first = row
+                last = row
+            start += stride
+        self._hashes_valid = True
+        if first < 0:
+            return None
+        return first, last + 1
+
+    # Decide what to push for Image: None if the frame is identical, 'full'
+    # when full is set, the controller was just initialised or the partial
+    # budget is used up, 'mono' in PROFILE_MONO, otherwise the (x, y, w, h)
+    # window over the changed rows, narrowed to the marked columns if any
+    def _plan_refresh(self, Image, full):
+        rows = self.changed_rows(Image)
+        dirty = self._dirty
+        self._dirty = None
+        if rows is None and not full and not self._full_pending:
+            self.frames_skipped += 1
+            return None
+        self.frames_pushed += 1
+        self.last_window = (0, 0, self.width, self.height)
+        if (full or self._full_pending or rows is None
+                or self._partial_count >= self.full_refresh_every):
+            return 'full'
+        if self.profile == PROFILE_MONO:
+            return 'mono'
+        if dirty is None:
+            x0 = 0
+            x1 = self.width
+        else:
+            x0 = dirty[0]
+            x1 = dirty[2]
+        self.last_window = (x0, rows[0], x1 - x0, rows[1] - rows[0])
+        return self.last_window
+
+    # Start the refresh chosen by _plan_refresh, returns (kind, settle ms)
+    def _start_plan(self, Image, plan):
+        if plan == 'mono':
+            plane = self.buffer_plane
+            encode_4gray(Image, plane, MONO_HI, MONO_LO)
+            self._start_mono(plane)
+            return 'mono', 100
+        if plan == 'full':
+            self._start_4Gray(Image)
+            return 'full', 500
+        self._start_partial(Image, *plan)
+        return 'partial', 100
+
+    def _finish_plan(self, Image, kind):
+        if kind == 'mono':
+            self._done_mono(self.buffer_plane)
+        elif kind == 'full':
+            self._done_4Gray()
+        else:
+            self._done_partial()
+
+    # A full refresh in PROFILE_MONO is a 4-gray one: the controller is
+    # initialised for 4 grays before and for the fast 1-bit mode after it
+    def _leaves_mono(self, plan):
+        return plan == 'full' and self.profile == PROFILE_MONO
+
+    # A sleeping controller must be woken before plan is sent, unless the
+    # plan starts with an init anyway
+    def _needs_wake(self, plan):
+        return self.asleep and not self._leaves_mono(plan)
+
+    # Push what changed since the last frame, see _plan_refresh. Image is
+    # the 4-gray buffer in either profile.
+    # Returns 'full', 'partial', 'mono' or None when the frame was skipped.
+    def EPD_2IN7_4Gray_Refresh(self, Image, full=False):
+        plan = self._plan_refresh(Image, full)
+        if plan is None:
+            return None
+        if self._needs_wake(plan):
+            self.wake()
+        leaves_mono = self._leaves_mono(plan)
+        if leaves_mono:
+            self.EPD_2IN7_Init_4Gray()
+        kind, settle = self._start_plan(Image, plan)
+        self._power('refresh')
+        self.delay_ms(settle)
+        self.ReadBusy()
+        self._power('awake')
+        self._finish_plan(Image, kind)
+        if leaves_mono:
+            self._enter_mono(Image)
+        if self.auto_sleep:
+            self.Sleep()
+        return kind
+
+    # Awaitable EPD_2IN7_4Gray_Refresh (defaults to buffer_4Gray): the
+    # transfer runs inline, the panel refresh is awaited via wait_busy.
+    # With double_buffer() and no Image, buffer_4Gray is swapped out first
+    # and can be drawn into again while the panel refreshes.
+    async def display(self, Image=None, full=False, timeout_ms=None):
+        if Image is None and self._front is not None:
+            return await self._display_swapped(full, timeout_ms)
+        if Image is None:
+            Image = self.buffer_4Gray
+        return await self._push(Image, full, timeout_ms)
+
+    async def _push(self, Image, full, timeout_ms):
+        plan = self._plan_refresh(Image, full)
+        if plan is None:
+            return None
+        if self._needs_wake(plan):
+            await self.wake_async()
+        leaves_mono = self._leaves_mono(plan)
+        if leaves_mono:
+            await self.EPD_2IN7_Init_4Gray_async()
+        kind, settle = self._start_plan(Image, plan)
+        self._power('refresh')
+        await self.wait_busy(settle, timeout_ms)
+        self._power('awake')
+        self._finish_plan(Image, kind)
+        if leaves_mono:
+            await self.EPD_2IN7_Init_async()
+            self._mono_shown(Image)
+        if self.auto_sleep:
+            self.Sleep()
+        return kind
+
+    # Opt-in double buffering for display(): a second 4-gray buffer, so the
+    # next frame can be drawn while the last one is still refreshing.
+    # double_buffer(False) frees it again.
+    def double_buffer(self, enable=True):
+        if not enable:
+            self._front = None
+            gc.collect()
+        elif self._front is None:
+            buf = bytearray(self.height * self.width // 4)
+            buf[:] = self.buffer_4Gray
+            self._front = (buf, framebuf.FrameBuffer(buf, self.width, self.height, framebuf.GS2_HMSB))
+
+    @property
+    def double_buffered(self):
+        return self._front is not None
+
+    # Wait until the refresh in flight is done, swap the drawing buffer with
+    # the free one and push it. The new drawing buffer starts as a copy of
+    # the pushed frame, so incremental drawing carries on from there.
+    async def _display_swapped(self, full, timeout_ms):
+        if self._display_lock is None:
+            self._display_lock = asyncio.Lock()
+        async with self._display_lock:
+            front = self._mode_buffers(MODE_4GRAY)
+            back = self._front
+            self._modes[MODE_4GRAY] = back
+            self._front = front
+            Image = front[0]
+            back[0][:] = Image
+            return await self._push(Image, full, timeout_ms)
 
         
     def Sleep(self):
-        self.send_command(0X50)
-        self.send_data(0xf7)
+        start = utime.ticks_ms()
+        self.send_command_data(0X50, b'\xf7')
         self.send_command(0X02)  # power off
-        self.send_command(0X07)  # deep sleep
-        self.send_data(0xA5)
+        self.send_command_data(0X07, b'\xA5')  # deep sleep
+        self.asleep = True
+        self._power('sleep')
+        self.power_stats['sleep_ms'] = utime.ticks_diff(utime.ticks_ms(), start)
+
+    # Leave deep sleep: a short reset (wake_reset_timing) and the init script
+    # sent last. Panel content, the frame hashes and the last
+    # 1-bit frame stay valid, so the next refresh does not have to be full.
+    def wake(self):
+        start = self._wake_start()
+        self.ReadBusy()
+        self._wake_done(start)
+
+    async def wake_async(self):
+        start = utime.ticks_ms()
+        await self._reset_async(self.wake_reset_timing)
+        self._power_on(self._init_script())
+        await self.wait_busy()
+        self._wake_done(start)
+
+    # Awaitable reset(timing); the short low pulse stays blocking
+    async def _reset_async(self, timing):
+        high, low, recover = timing
+        self.digital_write(self.reset_pin, 1)
+        await _sleep_ms(high)
+        self.digital_write(self.reset_pin, 0)
+        self.delay_ms(low)
+        self.digital_write(self.reset_pin, 1)
+        await _sleep_ms(recover)
+
+    # The init script last sent, so a wake restores the mode the controller
+    # was actually in, also after a direct EPD_2IN7_Init
+    def _init_script(self):
+        if self._script is not None:
+            return self._script
+        if self.profile == PROFILE_MONO:
+            return EPD_2in7_init_mono
+        return EPD_2in7_init_4gray
+
+    def _wake_start(self):
+        start = utime.ticks_ms()
+        self.reset(self.wake_reset_timing)
+        self._power_on(self._init_script())
+        return start
+
+    def _wake_done(self, start):
+        self._power_on_done(self._init_script())
+        stats = self.power_stats
+        stats['wake_ms'] = utime.ticks_diff(utime.ticks_ms(), start)
+        stats['wakes'] = stats.get('wakes', 0) + 1
+        # a cycle runs from one wake to the next, including the sleep
+        stats['cycle_mj'] = self._energy_mj
+        self._energy_mj = 0.0
+
+    # Account the time spent in the previous power state and enter state
+    def _power(self, state):
+        now = utime.ticks_ms()
+        elapsed = utime.ticks_diff(now, self._power_since)
+        self._energy_mj += self.power_mw[self._power_state] * elapsed / 1000
+        self._power_state = state
+        self._power_since = now
     
 if __name__=='__main__':
     
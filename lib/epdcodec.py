@@ -0,0 +1,83 @@
+"""
+`epdcodec` - plane encoders for the 2.7inch e-Paper
+====================================================
+
+Converts the GS2_HMSB framebuffer used by ``EPD_2in7.image4Gray`` into the
+two 1-bit planes the controller expects for a 4-gray refresh
+("old data" 0x10 and "new data" 0x13), or into the single plane of the
+fast 1-bit refresh.
+
+Every source byte holds four pixels, the first pixel in the two lowest bits.
+Two source bytes make one plane byte, first pixel in the MSB. The pixel to
+bit mapping is folded into lookup tables at import time, so encoding a plane
+is one table lookup per source byte and no branching.
+
+It also reorders the 1-bit landscape buffer into panel byte order.
+
+This module has no hardware dependencies and can be imported on the host.
+On MicroPython ``encode_4gray`` and ``transpose_pages`` are the viper
+versions from ``accel`` when available; the pure Python code stays as
+``encode_4gray_py`` and ``transpose_pages_py``.
+"""
+
+# pixel value -> plane bit
+#   0x03 white : old 1, new 1
+#   0x02 gray1 : old 0, new 1
+#   0x01 gray2 : old 1, new 0
+#   0x00 black : old 0, new 0
+
+
+def _build_tables(shift):
+    """Return (hi, lo) tables mapping a source byte to its plane nibble."""
+    hi = bytearray(256)
+    lo = bytearray(256)
+    for byte in range(256):
+        nibble = 0
+        for k in range(4):
+            nibble = (nibble << 1) | ((byte >> (2 * k + shift)) & 0x01)
+        hi[byte] = nibble << 4
+        lo[byte] = nibble
+    return bytes(hi), bytes(lo)
+
+
+GRAY_OLD_HI, GRAY_OLD_LO = _build_tables(0)
+GRAY_NEW_HI, GRAY_NEW_LO = _build_tables(1)
+
+# 1-bit plane of the fast mono refresh, thresholded by brightness: white and
+# the light gray (3, 1) become white, the dark gray and black (2, 0) black.
+# That is bit 0 of the pixel, the same as the old 4-gray plane.
+MONO_HI, MONO_LO = GRAY_OLD_HI, GRAY_OLD_LO
+
+
+def encode_4gray_py(src, dst, hi, lo, start=0, end=None):
+    """Encode plane bytes ``dst[start:end]`` from ``src[2*start:2*end]``.
+
+    ``hi``/``lo`` select the plane, e.g. ``GRAY_OLD_HI, GRAY_OLD_LO``.
+    ``dst`` is written in place, nothing is allocated."""
+    if end is None:
+        end = len(dst)
+    j = start * 2
+    for i in range(start, end):
+        dst[i] = hi[src[j]] | lo[src[j + 1]]
+        j += 2
+
+
+def transpose_pages_py(src, dst, wide, high):
+    """Reorder a MONO_VLSB landscape buffer (``wide`` pages of ``high``
+    bytes) into panel order: ``dst[j*wide + i] = src[(wide-1-i)*high + j]``.
+
+    Each page becomes one byte column of the panel, so the bytes are copied
+    unchanged."""
+    for i in range(wide):
+        page = (wide - 1 - i) * high
+        k = i
+        for j in range(page, page + high):
+            dst[k] = src[j]
+            k += wide
+
+
+try:
+    from accel import encode_4gray, transpose_pages
+except (ImportError, SyntaxError):
+    encode_4gray = encode_4gray_py
+    transpose_pages = transpose_pages_py
@@ -0,0 +1,40 @@
+# generated by tools/mkfont.py, do not edit
+HEIGHT = 24
+BPP = 2
+CHARS = ' %-.0123456789:C'
+WIDTHS = b'\x07\r\n\x05\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x05\x0c'
+DATA = (
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\xb9\x00\xa1\xff\xd0\xbd\xbe\xfc?>/o\x8f\x87\xef'
+    b'\xc3\xe2\xff\xe0\xbe\xff\xf0\x1f\xff\xf8\x01\xb9\xfc\x00\x00\xbe\x00\x00?\x00\x00/\xae@\x0f\xff\xf8\x0b\xff\xff\x03\xff'
+    b'\xc7\xc2\xfb\xe1\xf0\xfc\xfc|\xbe/\xff?\x03\xff\x87@.@\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x7f\xff\xc7\xff\xfd\x1a\xaa@\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xb4>\x06@\x00\x00\x00\x00\x00\x00\x00\x00\x00\xae\x00\x03\xff\xd0\x0b\xff'
+    b'\xf0/\x82\xf8?\x00\xfc~\x00}\xbd\x00>\xbc\x00/\xbc\x00/\xb8\x00/\xb8\x00/\xbc\x00/\xbc\x00/\xbd'
+    b'\x00>~\x00}?\x00\xfc/\x82\xf8\x0b\xff\xf0\x03\xff\xd0\x00\xae\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x00\t\x00\x00\x7f\x00\x01\xff\x00\x07\xff\x00\x0f\xff\x00\x1f\xaf\x00\x05/\x00\x00/\x00\x00/\x00\x00/\x00\x00/'
+    b'\x00\x00/\x00\x00/\x00\x00/\x00\x00/\x00\x00/\x00\x00/\x00\x00/\x00\x00/\x00\x00\x1e\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00j\x00\x07\xff\xe0\x1f\xff\xf8?\x81\xfd\xbd\x00~x\x00/\x00\x00/\x00\x00?'
+    b'\x00\x00\xbe\x00\x02\xfc\x00\x07\xf4\x00\x1f\xd0\x00?\x80\x00\xbe\x00\x02\xf8\x00\x0b\xf0\x00\x1f\xd0\x00\x7f\xea\xaa\xbf\xff'
+    b'\xff\x7f\xff\xfe\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\xae@\x0b\xff\xe0\x1f\xfb\xf8?A\xfd~\x00~('
+    b'\x00>\x00\x00>\x00\x00}\x00\x02\xfc\x00?\xf4\x00\x7f\xf4\x00\x1b\xfd\x00\x00\xbe\x00\x00/\x14\x00/\xbc\x00?'
+    b'~\x00\xbe/\xeb\xfc\x0b\xff\xf4\x01\xbe@\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x90\x00\x03\xf0\x00\x0b'
+    b'\xf0\x00\x0f\xf0\x00/\xf0\x00\x7f\xf0\x00\xff\xf0\x02\xfa\xf0\x07\xf2\xf0\x0b\xd2\xf0\x1f\x82\xf0?\x02\xf0\xbf\xab\xfa\xff'
+    b'\xff\xff\xbf\xff\xff\x00\x02\xf0\x00\x02\xf0\x00\x02\xf0\x00\x02\xf0\x00\x01\xd0\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x1f\xff\xfd/\xff\xfe/\xaa\xa9.\x00\x00>\x00\x00>\x00\x00>i\x00\x7f\xff\xd0\x7f\xff\xf4\x7f\x96\xfc.\x00'
+    b'~\x00\x00?\x00\x00/\x10\x00/|\x00/}\x00~?A\xfd/\xfb\xf8\x0b\xff\xe0\x01\xbe@\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00@\x00\x0b\xe0\x00/\xe0\x00\xbf\x80\x02\xf8\x00\x0b\xe0\x00\x0f\xc0\x00/\xa9\x00'
+    b'?\xff\xe0\x7f\xff\xf8\xbf\x96\xfd\xbe\x00~\xbc\x00/\xb8\x00/\xbc\x00/\xbd\x00>\x7f@\xbd/\xfb\xf8\x0b\xff'
+    b'\xe0\x01\xbe@\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xbf\xff\xfe\xff\xff\xff\xaa\xaa\xbf\x00\x00>\x00\x00\xbd\x00'
+    b'\x00\xfc\x00\x01\xf8\x00\x02\xf4\x00\x03\xf0\x00\x07\xe0\x00\x0b\xd0\x00\x0f\xc0\x00\x1f@\x00/\x00\x00>\x00\x00}\x00'
+    b'\x00\xbc\x00\x00\xf8\x00\x02\xf4\x00\x00\xa0\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\xbe@\x07\xff\xe0\x1f\xfb'
+    b'\xf8/A\xfc>\x00\xbd~\x00~~\x00}?\x00\xbd/\xd6\xf8\x0b\xff\xf4\x1f\xff\xf8?\x96\xfd\xbe\x00~\xbc'
+    b'\x00/\xb8\x00/\xbc\x00?~@\xbe/\xeb\xfc\x0b\xff\xf4\x01\xbe@\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+    b'\x01\xbe@\x0b\xff\xe0/\xfb\xf8\x7f@\xbd\xbd\x00>\xbc\x00/\xb8\x00/\xbc\x00/~\x00\x7f?\x96\xfe\x1f\xff'
+    b'\xfe\x07\xff\xfd\x00j\xfc\x00\x02\xf4\x00\x0b\xe0\x00/\xc0\x01\xff@\x07\xfd\x00\x07\xe0\x00\x01\x00\x00\x00\x00\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00-\x0f\x81\x90\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xb4>\x06@\x00\x00'
+    b'\x00\x00\x00\x00\x00\x00\x00n\x80\x02\xff\xf4\x0b\xfb\xfc\x1f\xd0\xbe/@/~\x00\x1a}\x00\x00\xbc\x00\x00\xbc\x00'
+    b'\x00\xb8\x00\x00\xb8\x00\x00\xbc\x00\x00\xbc\x00\x00}\x00\x00~\x00\x1a/@/\x1f\xd0\xbe\x0b\xfb\xfc\x02\xff\xf4\x00'
+    b'n\x80\x00\x00\x00\x00\x00\x00'
+)
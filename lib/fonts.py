@@ -0,0 +1,176 @@
+"""
+`fonts` - packed bitmap fonts for the 4-gray framebuffer
+========================================================
+
+Glyphs are stored as packed tables (see ``tools/mkfont.py``): every glyph is
+``width * height`` pixels, row by row, ``bpp`` bits per pixel with the first
+pixel in the MSB, padded to a whole byte at the end of the glyph.
+
+* ``bpp=1``: ink or background.
+* ``bpp=2``: coverage 0..3 for anti-aliased glyphs. The levels between
+  background and ink become the gray values in between along ``RAMP``, for
+  black on white ``epd.grayish`` (0x55, light) for faint edges and
+  ``epd.darkgray`` (0xaa, dark) for heavier ones.
+
+Drawing a string does not touch single pixels: every glyph is rasterized once
+into a small GS2_HMSB ``FrameBuffer`` and then blitted. The rasterized glyphs
+are kept in a bounded LRU ``GlyphCache``.
+"""
+
+import framebuf
+
+# GS2 values from white to black: 1 (0x55) is the light gray, 2 (0xaa) the dark one
+RAMP = (3, 1, 2, 0)
+
+
+def blend(bg, fg, level, top):
+    """Gray value ``level / top`` of the way from ``bg`` to ``fg`` along ``RAMP``,
+    rounded towards ``bg``."""
+    a = RAMP.index(bg & 3)
+    b = RAMP.index(fg & 3)
+    step = abs(b - a) * level // top
+    return RAMP[a + step if b >= a else a - step]
+
+
+class Font:
+    """Packed glyph table.
+
+    :param int height: glyph height in pixels
+    :param int bpp: bits per pixel, 1 or 2
+    :param str chars: characters in table order
+    :param bytes widths: glyph width in pixels per character
+    :param bytes data: packed glyphs, back to back
+    :param int spacing: pixels between two glyphs"""
+
+    def __init__(self, height, bpp, chars, widths, data, spacing=1):
+        self.height = height
+        self.bpp = bpp
+        self.chars = chars
+        self.widths = widths
+        self.data = data
+        self.spacing = spacing
+        self.max_width = max(widths)
+        self._offsets = {}
+        offset = 0
+        for i, char in enumerate(chars):
+            self._offsets[char] = (offset, widths[i])
+            offset += (widths[i] * height * bpp + 7) // 8
+
+    def glyph(self, char):
+        """Return ``(offset, width)`` of ``char``, falling back to the space
+        or the first glyph for unknown characters."""
+        glyph = self._offsets.get(char)
+        if glyph is None:
+            glyph = self._offsets.get(' ') or self._offsets[self.chars[0]]
+        return glyph
+
+    def text_width(self, text, scale=1):
+        if not text:
+            return 0
+        width = 0
+        for char in text:
+            width += self.glyph(char)[1] + self.spacing
+        return (width - self.spacing) * scale
+
+    def advance(self, scale=1):
+        """Widest glyph plus spacing, for fixed-size boxes."""
+        return (self.max_width + self.spacing) * scale
+
+    def rasterize(self, char, fg, bg, scale=1):
+        """Return ``(buffer, width, height)`` of ``char`` as GS2_HMSB pixels."""
+        offset, width = self.glyph(char)
+        height = self.height
+        buf = bytearray(((width * scale + 3) // 4) * height * scale)
+        fb = framebuf.FrameBuffer(buf, width * scale, height * scale, framebuf.GS2_HMSB)
+        fb.fill(bg)
+        bpp = self.bpp
+        top = (1 << bpp) - 1
+        # coverage level -> pixel value between background and ink
+        levels = [blend(bg, fg, level, top) for level in range(top + 1)]
+        data = self.data
+        bit = offset * 8
+        for y in range(height):
+            for x in range(width):
+                level = (data[bit >> 3] >> (8 - bpp - (bit & 7))) & top
+                bit += bpp
+                if level:
+                    if scale == 1:
+                        fb.pixel(x, y, levels[level])
+                    else:
+                        fb.fill_rect(x * scale, y * scale, scale, scale, levels[level])
+        return buf, width * scale, height * scale
+
+
+class GlyphCache:
+    """LRU cache of rasterized glyphs, bounded by ``max_bytes`` of pixel
+    data. ``hits`` and ``misses`` count lookups."""
+
+    def __init__(self, max_bytes=4096):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self._glyphs = {}
+        self._sizes = {}
+        self._order = []
+
+    def get(self, font, char, fg, bg, scale=1):
+        """Return ``(FrameBuffer, width, height)`` for ``char``."""
+        key = (id(font), char, fg, bg, scale)
+        entry = self._glyphs.get(key)
+        order = self._order
+        if entry is not None:
+            self.hits += 1
+            if order[-1] != key:
+                order.remove(key)
+                order.append(key)
+            return entry
+        self.misses += 1
+        buf, width, height = font.rasterize(char, fg, bg, scale)
+        entry = (framebuf.FrameBuffer(buf, width, height, framebuf.GS2_HMSB), width, height)
+        size = len(buf)
+        while order and self.used + size > self.max_bytes:
+            old = order.pop(0)
+            self.used -= self._sizes.pop(old)
+            del self._glyphs[old]
+        self._glyphs[key] = entry
+        self._sizes[key] = size
+        order.append(key)
+        self.used += size
+        return entry
+
+    def clear(self):
+        self._glyphs.clear()
+        self._sizes.clear()
+        del self._order[:]
+        self.used = 0
+
+
+cache = GlyphCache()
+
+
+def draw_text(fb, font, text, x, y, fg, bg=3, scale=1, transparent=True, glyphs=None):
+    """Draw ``text`` at ``x, y`` into the GS2_HMSB framebuffer ``fb`` and
+    return the width drawn.
+
+    ``fg``/``bg`` are framebuffer colours, e.g. ``epd.black`` and
+    ``epd.white``. With ``transparent`` the background pixels of the glyphs
+    are not drawn; otherwise each glyph box is filled with ``bg``."""
+    fg &= 3
+    bg &= 3
+    if glyphs is None:
+        glyphs = cache
+    key = bg if transparent else -1
+    start = x
+    for char in text:
+        glyph, width, height = glyphs.get(font, char, fg, bg, scale)
+        fb.blit(glyph, x, y, key)
+        x += width + font.spacing * scale
+    return x - start - font.spacing * scale if text else 0
+
+
+def load(name, spacing=1):
+    """Import a module written by ``tools/mkfont.py`` and return its Font."""
+    module = __import__(name)
+    return Font(module.HEIGHT, module.BPP, module.CHARS, module.WIDTHS,
+                module.DATA, spacing)
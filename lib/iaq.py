@@ -0,0 +1,119 @@
+"""
+`iaq` - air quality score from the BME680 gas resistance
+========================================================
+
+``IAQ.update(gas, temperature, humidity)`` turns one gas measurement into a
+score from 0 (much worse than usual) to 100 (as clean as the cleanest air
+seen lately):
+
+* humidity compensation: the gas resistance drops with the water content of
+  the air, so ``log(gas)`` is corrected by ``humidity_slope`` per g/m3 of
+  absolute humidity, computed from the sensor's own temperature and rH,
+* baseline: the compensated value of clean air, followed quickly upwards
+  (``up``) and slowly downwards (``down``), so a stuffy room does not become
+  the new normal,
+* burn-in: the heater needs a while after power-on, the first ``burn_in``
+  samples only train the baseline (or are ignored when a saved baseline was
+  restored); without a baseline the score is ``None`` until then,
+* state: a few floats, constant work per sample. ``save()``/``load()`` keep
+  the baseline in a small binary file across restarts.
+
+``tools/iaq_replay.py`` replays recorded traces through it.
+"""
+
+import math
+import struct
+
+_MAGIC = b'IAQ1'
+_STATE = '<4sf'
+
+
+def absolute_humidity(temperature, humidity):
+    """Water content of the air in g/m3 (Magnus formula)."""
+    vapour = 6.112 * math.exp(17.62 * temperature / (243.12 + temperature)) * humidity / 100
+    return 216.7 * vapour / (273.15 + temperature)
+
+
+class IAQ:
+    """
+    :param int burn_in: samples after start before the baseline learns
+    :param float humidity_slope: change of ``log(gas)`` per g/m3 absolute
+        humidity, see ``tools/iaq_replay.py --fit``
+    :param float up: learning rate towards cleaner air (per sample)
+    :param float down: learning rate towards worse air (per sample)
+    """
+
+    def __init__(self, burn_in=30, humidity_slope=0.04, up=0.05, down=0.005):
+        self.burn_in = burn_in
+        self.humidity_slope = humidity_slope
+        self.up = up
+        self.down = down
+        self.samples = 0
+        self.score = None
+        self._baseline = None   # log of the compensated gas resistance of clean air
+        self._restored = False
+
+    @property
+    def ready(self):
+        """True once the burn-in is over."""
+        return self.samples >= self.burn_in
+
+    @property
+    def baseline(self):
+        """Baseline as gas resistance in ohms at 0 g/m3, ``None`` before the first one."""
+        return None if self._baseline is None else math.exp(self._baseline)
+
+    @baseline.setter
+    def baseline(self, ohms):
+        self._baseline = math.log(ohms)
+        self._restored = True
+
+    def compensate(self, gas, temperature, humidity):
+        """``log(gas)`` corrected to dry air."""
+        return math.log(gas) + self.humidity_slope * absolute_humidity(temperature, humidity)
+
+    def update(self, gas, temperature, humidity):
+        """Add one measurement (ohms, degrees, rH %) and return the new ``score``.
+        ``temperature`` is the sensor's own reading, without any offset."""
+        if gas <= 0:
+            return self.score
+        value = self.compensate(gas, temperature, humidity)
+        self.samples += 1
+        baseline = self._baseline
+        if baseline is None:
+            baseline = value
+        elif self.samples <= self.burn_in:
+            # warming up: a restored baseline stays, a new one follows the recent values
+            if not self._restored:
+                baseline += (value - baseline) * 0.2
+        elif value > baseline:
+            baseline += (value - baseline) * self.up
+        else:
+            baseline += (value - baseline) * self.down
+        self._baseline = baseline
+        if self.samples < self.burn_in and not self._restored:
+            self.score = None
+        else:
+            delta = value - baseline
+            self.score = 100.0 if delta >= 0 else 100.0 * math.exp(delta)
+        return self.score
+
+    def save(self, path):
+        """Write the baseline to ``path``; raises ``OSError``."""
+        if self._baseline is None:
+            return
+        with open(path, 'wb') as f:
+            f.write(struct.pack(_STATE, _MAGIC, self._baseline))
+
+    def load(self, path):
+        """Restore the baseline from ``path``, False if there is none."""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return False
+        if len(data) != struct.calcsize(_STATE) or data[:4] != _MAGIC:
+            return False
+        self._baseline = struct.unpack(_STATE, data)[1]
+        self._restored = True
+        return True
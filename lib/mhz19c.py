@@ -43,13 +43,23 @@ class MHZ19BSensor:
 
     # check data returned by the sensor
     def is_valid(self, buf):
-        if buf is None or buf[0] != 0xFF or buf[1] != 0x86:
-            return False
-        i = 1
-        checksum = 0x00
-        while i < 8:
-            checksum += buf[i] % 256
-            i += 1
-        checksum = ~checksum & 0xFF
-        checksum += 1
-        return checksum == buf[8]
\ No newline at end of file
+        return _is_valid(buf)
+
+
+def is_valid_py(buf):
+    if buf is None or len(buf) < 9 or buf[0] != 0xFF or buf[1] != 0x86:
+        return False
+    i = 1
+    checksum = 0x00
+    while i < 8:
+        checksum += buf[i] % 256
+        i += 1
+    checksum = ~checksum & 0xFF
+    checksum += 1
+    return checksum == buf[8]
+
+
+try:
+    from accel import mhz19_valid as _is_valid
+except (ImportError, SyntaxError):
+    _is_valid = is_valid_py
\ No newline at end of file
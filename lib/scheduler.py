@@ -0,0 +1,112 @@
+"""
+`scheduler` - decides when the dashboard is worth a panel refresh
+=================================================================
+
+Every cycle the measured values are passed to ``update()``. ``decide()``
+then returns ``None`` (keep the panel as it is), ``'partial'`` or ``'full'``:
+
+* a refresh needs at least one watched value to move by at least its
+  threshold since it was last shown, and ``min_interval_ms`` since the
+  last refresh,
+* after ``max_interval_ms`` the panel is refreshed anyway, so nothing on it
+  gets older than that,
+* partial and fast refreshes use up the ghosting budget, weighted by the
+  share of the panel they covered; once it is spent the next refresh is a
+  full one, which resets it.
+
+``stats()`` reports how many refreshes were avoided.
+"""
+
+import utime
+
+
+class RefreshScheduler:
+    """
+    :param int min_interval_ms: shortest time between two refreshes
+    :param max_interval_ms: refresh at least this often, ``None`` for never
+    :param float ghost_budget: panel areas of partial refreshes until a
+        full refresh, e.g. 4.0 = four full-screen partials or more small ones
+    """
+
+    def __init__(self, min_interval_ms=60000, max_interval_ms=900000, ghost_budget=4.0):
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max_interval_ms
+        self.ghost_budget = ghost_budget
+        self.ghosting = 0.0
+        self.thresholds = {}
+        self.values = {}
+        self.shown = {}
+        self._last = None
+        self.cycles = 0
+        self.avoided = 0
+        self.refreshes = {}
+        self.escalations = 0
+
+    def watch(self, name, threshold=0):
+        """Refresh when ``name`` moves by at least ``threshold``. With 0 any
+        change counts; non-numeric values always compare for equality."""
+        self.thresholds[name] = threshold
+
+    def update(self, name, value):
+        self.values[name] = value
+
+    def changed(self):
+        """Names of the watched values that moved by their threshold."""
+        names = []
+        shown = self.shown
+        for name, threshold in self.thresholds.items():
+            value = self.values.get(name)
+            if name not in shown:
+                names.append(name)
+                continue
+            old = shown[name]
+            if threshold and isinstance(value, (int, float)) and isinstance(old, (int, float)):
+                if abs(value - old) >= threshold:
+                    names.append(name)
+            elif value != old:
+                names.append(name)
+        return names
+
+    def decide(self, now=None):
+        """Return ``None``, ``'partial'`` or ``'full'`` for this cycle. When a
+        refresh is returned the current values count as shown."""
+        if now is None:
+            now = utime.ticks_ms()
+        self.cycles += 1
+        if self._last is None:
+            kind = 'full'
+        else:
+            elapsed = utime.ticks_diff(now, self._last)
+            stale = self.max_interval_ms is not None and elapsed >= self.max_interval_ms
+            if elapsed < self.min_interval_ms or not (stale or self.changed()):
+                self.avoided += 1
+                return None
+            kind = 'partial'
+            if self.ghosting >= self.ghost_budget:
+                kind = 'full'
+                self.escalations += 1
+        self._last = now
+        self.shown.update(self.values)
+        return kind
+
+    def refreshed(self, kind, window=None, height=None):
+        """Account a refresh done by the driver: ``kind`` as returned by
+        ``EPD_2in7.display()``, ``window`` its ``last_window``."""
+        if kind is None:
+            return
+        self.refreshes[kind] = self.refreshes.get(kind, 0) + 1
+        if kind == 'full':
+            self.ghosting = 0.0
+        elif window is None or not height:
+            self.ghosting += 1.0
+        else:
+            self.ghosting += window[3] / height
+
+    def stats(self):
+        return {
+            'cycles': self.cycles,
+            'avoided': self.avoided,
+            'refreshes': self.refreshes,
+            'escalations': self.escalations,
+            'ghosting': self.ghosting,
+        }
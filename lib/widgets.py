@@ -0,0 +1,220 @@
+"""
+`widgets` - retained-mode layout for the 4-gray dashboard
+=========================================================
+
+A ``Layout`` owns the widgets drawn into ``EPD_2in7.image4Gray``. Static
+widgets (``Label``, ``Separator``) are rendered once into a template buffer,
+which is copied into the framebuffer with a single slice assignment. After
+that, ``render()`` only touches ``Value`` widgets whose text changed: their
+box is restored from the template, every value overlapping it is drawn again,
+and the box is reported to the driver with ``mark_dirty`` for the partial
+refresh.
+"""
+
+import framebuf
+
+from fonts import draw_text
+
+
+class Widget:
+    """Base class: a box at ``x, y`` of ``w`` x ``h`` pixels."""
+
+    static = True
+
+    def __init__(self, x, y, w, h, color=None):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.color = color
+
+    def bounds(self):
+        return self.x, self.y, self.w, self.h
+
+    def draw(self, fb, color, background):
+        raise NotImplementedError()
+
+
+class Label(Widget):
+    """Fixed text in the built-in 8x8 font."""
+
+    def __init__(self, text, x, y, color=None):
+        super().__init__(x, y, 8 * len(text), 8, color)
+        self.text = text
+
+    def draw(self, fb, color, background):
+        fb.text(self.text, self.x, self.y, color)
+
+
+class Separator(Widget):
+    """Horizontal rule of ``w`` pixels."""
+
+    def __init__(self, x, y, w, color=None):
+        super().__init__(x, y, w, 1, color)
+
+    def draw(self, fb, color, background):
+        fb.hline(self.x, self.y, self.w, color)
+
+
+class Value(Widget):
+    """Changing text of at most ``chars`` characters, left or right aligned
+    in its box. ``set()`` only flags a redraw when the text differs.
+
+    Without ``font`` the built-in 8x8 font is used, otherwise a
+    ``fonts.Font`` enlarged by ``scale``."""
+
+    static = False
+
+    def __init__(self, x, y, chars, text='', align='left', color=None, font=None, scale=1):
+        if font is None:
+            w, h = 8 * chars, 8
+        else:
+            w, h = chars * font.advance(scale), font.height * scale
+        super().__init__(x, y, w, h, color)
+        self.chars = chars
+        self.align = align
+        self.font = font
+        self.scale = scale
+        self.text = text
+        self.changed = True
+
+    def set(self, text):
+        text = text[:self.chars]
+        if text != self.text:
+            self.text = text
+            self.changed = True
+
+    def draw(self, fb, color, background):
+        font = self.font
+        x = self.x
+        if self.align == 'right':
+            if font is None:
+                x += self.w - 8 * len(self.text)
+            else:
+                x += self.w - font.text_width(self.text, self.scale)
+        if font is None:
+            fb.text(self.text, x, self.y, color)
+        else:
+            draw_text(fb, font, self.text, x, self.y, color, background, self.scale)
+
+
+def _overlaps(a, b):
+    return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and
+            a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+
+class Layout:
+    """Widgets drawn into the 4-gray framebuffer of ``epd``.
+
+    :param epd: ``EPD_2in7`` instance
+    :param background: fill colour of the template, default ``epd.white``
+    :param foreground: default widget colour, default ``epd.black``"""
+
+    def __init__(self, epd, background=None, foreground=None):
+        self.epd = epd
+        self.background = epd.white if background is None else background
+        self.foreground = epd.black if foreground is None else foreground
+        self.widgets = []
+        self._template = None
+        self._valid = False
+        self._buffers = ()
+
+    def add(self, widget):
+        self.widgets.append(widget)
+        if widget.static:
+            self._template = None
+        self._valid = False
+        return widget
+
+    def invalidate(self):
+        """Copy the template and draw every value again on the next render,
+        e.g. after something else drew into the framebuffer."""
+        self._valid = False
+
+    def _buffer_ids(self):
+        # the drawing buffer, and with double buffering the other one, which
+        # gets a copy of the drawing buffer on every swap
+        epd = self.epd
+        front = epd._front
+        if front is None:
+            return (id(epd.buffer_4Gray),)
+        return id(epd.buffer_4Gray), id(front[0])
+
+    def _color(self, widget):
+        return self.foreground if widget.color is None else widget.color
+
+    def _prerender(self):
+        epd = self.epd
+        template = bytearray(len(epd.buffer_4Gray))
+        fb = framebuf.FrameBuffer(template, epd.width, epd.height, framebuf.GS2_HMSB)
+        fb.fill(self.background)
+        for widget in self.widgets:
+            if widget.static:
+                widget.draw(fb, self._color(widget), self.background)
+        self._template = template
+
+    def _clip(self, bounds):
+        # widget box widened to whole bytes and cut to the panel, None if
+        # nothing of it is visible
+        x, y, w, h = bounds
+        x0 = max(0, x & ~3)
+        x1 = min(self.epd.width, (x + w + 3) & ~3)
+        y0 = max(0, y)
+        y1 = min(self.epd.height, y + h)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return x0, y0, x1 - x0, y1 - y0
+
+    def _restore(self, x, y, w, h):
+        # GS2_HMSB: four pixels per byte, rows of width // 4 bytes
+        stride = self.epd.width // 4
+        start = max(0, x // 4)
+        end = min(stride, (x + w + 3) // 4)
+        if start >= end:
+            return
+        buf = memoryview(self.epd.buffer_4Gray)
+        template = memoryview(self._template)
+        for row in range(max(0, y), min(self.epd.height, y + h)):
+            offset = row * stride
+            buf[offset + start:offset + end] = template[offset + start:offset + end]
+
+    def render(self):
+        """Bring the framebuffer up to date and return the changed boxes as
+        ``(x, y, w, h)`` tuples, which are also passed to ``epd.mark_dirty``."""
+        epd = self.epd
+        fb = epd.image4Gray
+        values = [widget for widget in self.widgets if not widget.static]
+        if self._template is None:
+            self._prerender()
+        # a buffer the layout never drew into (e.g. reallocated after
+        # release_mode) is drawn from scratch
+        buffers = self._buffer_ids()
+        if buffers[0] not in self._buffers:
+            self._valid = False
+        self._buffers = buffers
+        if not self._valid:
+            memoryview(epd.buffer_4Gray)[:] = self._template
+            for widget in values:
+                widget.draw(fb, self._color(widget), self.background)
+                widget.changed = False
+            self._valid = True
+            return [(0, 0, epd.width, epd.height)]
+
+        boxes = []
+        for widget in values:
+            if widget.changed:
+                box = self._clip(widget.bounds())
+                if box is None:
+                    widget.changed = False  # off the panel
+                    continue
+                self._restore(*box)
+                boxes.append(box)
+        if not boxes:
+            return boxes
+        for widget in values:
+            if widget.changed or any(_overlaps(widget.bounds(), box) for box in boxes):
+                widget.draw(fb, self._color(widget), self.background)
+                widget.changed = False
+        for box in boxes:
+            epd.mark_dirty(*box)
+        return boxes
@@ -1,11 +1,17 @@
 from machine import Pin, UART, I2C, reset
 from mhz19c import MHZ19BSensor
-from epaper import EPD_2in7
+from epaper import EPD_2in7, PROFILE_4GRAY, PROFILE_MONO
+from widgets import Layout, Label, Separator, Value
+from charts import History, Sparkline
+from scheduler import RefreshScheduler
+from iaq import IAQ
+import fonts
 from utime import sleep, sleep_ms
 from bme680 import *
 import network # type: ignore
 from mqttLib import MQTTClient, MQTTException
 import gc
+import asyncio
 import private
 import utime
 
@@ -39,26 +45,23 @@ flash(100,2)
 # Functions
 ##########
 
-# --- Funktionen zum Speichern und Laden des VOC-Basiswerts ---
-def save_baseline(baseline):
-    """Speichert den VOC-Basiswert in eine Datei."""
+# --- Funktionen zum Speichern und Laden des Luftguete-Basiswerts ---
+def save_baseline(luft):
+    """Speichert den Basiswert der Luftguete in eine Datei."""
+    if luft.baseline is None:
+        return
     try:
-        with open('baseline.txt', 'w') as f:
-            f.write(str(baseline))
-        print(f"Basiswert {baseline} erfolgreich in 'baseline.txt' gespeichert.")
+        luft.save('iaq.dat')
+        print(f"Basiswert {luft.baseline:.0f} erfolgreich in 'iaq.dat' gespeichert.")
     except Exception as e:
         print(f"Fehler beim Speichern des Basiswerts: {e}")
 
-def load_baseline():
-    """Lädt den VOC-Basiswert aus einer Datei."""
-    try:
-        with open('baseline.txt', 'r') as f:
-            baseline_str = f.read()
-            print(f"Basiswert aus 'baseline.txt' geladen: {baseline_str}")
-            return float(baseline_str)
-    except (OSError, ValueError) as e:
-        print(f"Keine gültige 'baseline.txt' gefunden oder Lesefehler: {e}. Starte mit Standardwert.")
-        return 50000.0 # Standard-Startwert
+def load_baseline(luft):
+    """Lädt den Basiswert der Luftguete aus einer Datei."""
+    if luft.load('iaq.dat'):
+        print(f"Basiswert aus 'iaq.dat' geladen: {luft.baseline:.0f}")
+    else:
+        print("Keine gültige 'iaq.dat' gefunden. Basiswert wird in der Einlaufphase gelernt.")
 
 # --- Wifi ---
 def connectWifi():
@@ -102,7 +105,9 @@ mqtt_client_hass = MQTTClient(
     password=mqtt_password_hass)
 
 # Variablen für die intelligente Logik
-voc_baseline = load_baseline() # Lade den gespeicherten Basiswert beim Start
+luft = IAQ() # Luftguete aus Gaswiderstand, Feuchte und Temperatur
+load_baseline(luft) # Lade den gespeicherten Basiswert beim Start
+letzte_gasmessung = None
 last_ntp_sync = 0
 time_synced = False
 last_save_time = utime.time() # Zeit des letzten Speicherns merken
@@ -111,10 +116,10 @@ consecutive_errors = 0 # Fehlerzähler
 # --- Trends ---
 # Wir speichern die letzten 5 Messwerte
 history_size = 5
-co2_history = []
-voc_history = []
-temp_history = []
-humi_history = []
+co2_history = History(history_size)
+voc_history = History(history_size)
+temp_history = History(history_size)
+humi_history = History(history_size)
 
 # Start-Annahme für die Trends
 co2_trend = '→'
@@ -132,6 +137,9 @@ sealevelpressure = 1012.25
 # Stelle sicher, dass du den richtigen I2C-Bus (0 oder 1) verwendest
 bme680 = BME680_I2C(I2C(0, sda=bme680_i2c_sda, scl=bme680_i2c_scl, freq=100000))
 temperature_offset = -3.3
+# Gasmessung (Heizplatte) nur bei jeder n-ten Messung; seltener heizt den Sensor weniger auf,
+# dann temperature_offset neu bestimmen
+bme680.gas_interval = 1
 if 'sealevelpressure' in locals():
     bme680.sea_level_pressure = sealevelpressure
 degreecels = '\u00B0' + "C"
@@ -149,6 +157,56 @@ mhz = MHZ19BSensor(tx_pin=mhz_tx_pin, rx_pin=mhz_rx_pin)
 # ePaper-Display
 #####
 epd = EPD_2in7()
+epd.full_refresh_every = 30 # Obergrenze, das Ghosting-Budget steuert der Scheduler
+# Tagsueber schnelle 1-Bit-Aktualisierung, nachts 4 Graustufen
+epd_mono_von = 7
+epd_mono_bis = 22
+# Zweiter Bildpuffer: waehrend das Display aktualisiert, wird schon weitergezeichnet
+epd.double_buffer()
+# Zwischen den Aktualisierungen Tiefschlaf, Aufwachen mit kurzem Reset
+epd.auto_sleep = True
+epd.wake_reset_timing = (20, 2, 20)
+print("ePaper Speicher:", epd.mem_report())
+
+# Nur aktualisieren, wenn sich etwas Nennenswertes geaendert hat,
+# spaetestens aber alle 15 Minuten
+planer = RefreshScheduler(min_interval_ms=60000, max_interval_ms=900000, ghost_budget=4.0)
+planer.watch('co2', 25)
+planer.watch('temp', 0.2)
+planer.watch('humi', 1.0)
+planer.watch('luftguete', 5)
+planer.watch('zeit', 10) # Minuten seit Mitternacht, Uhr allein loest nur alle 10 Minuten aus
+for name in ('co2_bewertung', 'co2_trend', 'temp_trend', 'humi_trend', 'voc_trend'):
+    planer.watch(name)
+
+# Dashboard-Layout: feste Elemente werden einmal vorgerendert,
+# danach werden nur geaenderte Werte neu gezeichnet
+ziffern = fonts.load('font_digits24') # 24 px Ziffern mit Graustufen-Kanten
+dashboard = Layout(epd)
+dashboard.add(Label("RAUMKLIMA", 15, 8))
+dashboard.add(Separator(8, 24, 160))
+dashboard.add(Label("ppm", 78, 73))
+dashboard.add(Separator(8, 90, 160))
+dashboard.add(Separator(15, 130, 146))
+dashboard.add(Separator(15, 165, 146))
+w_zeit = dashboard.add(Value(120, 8, 5))
+w_co2_titel = dashboard.add(Value(15, 45, 7))
+w_co2_bewertung = dashboard.add(Value(95, 45, 10))
+w_co2 = dashboard.add(Value(15, 58, 4, align='right', font=ziffern))
+w_temp_titel = dashboard.add(Value(15, 110, 14))
+w_temp = dashboard.add(Value(115, 110, 7)) # "-10.5 C", endet bei x 171
+w_humi_titel = dashboard.add(Value(15, 145, 16))
+w_humi = dashboard.add(Value(115, 145, 7))
+w_voc_titel = dashboard.add(Value(15, 180, 13))
+w_voc = dashboard.add(Value(115, 180, 5))
+# Verlauf: eine Spalte fasst mehrere Messungen zusammen (Min/Max-Band)
+dashboard.add(Separator(8, 196, 160))
+dashboard.add(Label("CO2", 15, 201))
+dashboard.add(Label("T", 15, 239))
+dashboard.add(Label("rH", 91, 239))
+chart_co2 = dashboard.add(Sparkline(45, 200, 116, 30, per_column=12, span=100))  # ca. 24 h
+chart_temp = dashboard.add(Sparkline(25, 234, 62, 26, per_column=24, span=1))    # ca. 24 h
+chart_humi = dashboard.add(Sparkline(109, 234, 52, 26, per_column=28, span=5))   # ca. 24 h
 
 
 ##########
@@ -159,178 +217,230 @@ epd = EPD_2in7()
 connectWifi()
 
 
-# --- main loop ---
-while True:
+# --- Dashboard-Aktualisierung (wartet asynchron auf BUSY) ---
+display_fehler = None
+
+
+async def refresh_dashboard(full):
+    # Laeuft im Hintergrund: Fehler werden fuer die Hauptschleife gemerkt, die
+    # sie beim naechsten Durchlauf wie ihre eigenen behandelt
+    global display_fehler
     try:
-        # ----- Zeit-Synchronisation (NTP) -----
-        if NTP_AVAILABLE and (not time_synced or utime.time() - last_ntp_sync > 21600):
-            if wlan.isconnected():
-                try:
-                    print("Synchronisiere Uhrzeit via NTP...")
-                    ntptime.settime()
-                    last_ntp_sync = utime.time()
-                    time_synced = True
-                    print("Uhrzeit synchronisiert.")
-                except Exception as e:
-                    print(f"NTP-Fehler: {e}")
-                    time_synced = False
-            else:
-                print("Kein WLAN für NTP-Sync.")
-
-        # ----- MQTT-Verbindung -----
-        if mqtt_client_hass.sock is None:
-            print("MQTT-Verbindung wird aufgebaut...")
-            if not wlan.isconnected(): connectWifi()
-            mqtt_client_hass.connect()
-            print("MQTT verbunden.")
-
-        ###
-        # 1. Daten auslesen
-        ###
-        co2 = mhz.measure()[0]
-        temp = bme680.temperature + temperature_offset
-        humi = bme680.humidity
-        voc = bme680.gas
-
-        ###
-        # 2. Daten interpretieren & Logik für Dauerbetrieb
-        ###
-        co2_bewertung = "Gut"
-        if co2 > 1400: co2_bewertung = "Schlecht"
-        elif co2 > 1000: co2_bewertung = "Mittel"
-
-        lernfaktor_up = 0.05
-        lernfaktor_down = 0.005
-        if voc > voc_baseline:
-            voc_baseline += (voc - voc_baseline) * lernfaktor_up
-        else:
-            voc_baseline += (voc - voc_baseline) * lernfaktor_down
-        
-        luftguete_prozent = min(100, (voc / voc_baseline) * 100)
+        refresh_art = await epd.display(full=full)
+    except OSError as e:
+        print(f"Display-Fehler: {e}")
+        display_fehler = e
+        return
+    planer.refreshed(refresh_art, epd.last_window, epd.height)
+    if refresh_art is None:
+        print(f"Dashboard unveraendert ({epd.frames_skipped} uebersprungen, {epd.frames_pushed} gesendet).")
+    else:
+        print(f"Dashboard aktualisiert ({refresh_art}).")
+        print("Refresh-Dauer [Anzahl, letzte ms, gesamt ms]:", epd.refresh_stats)
+        print("Display Aufwachen/Schlafen [ms] und Energie pro Zyklus [mJ]:", epd.power_stats)
+
 
-        zeit_str = "--:--"
-        if time_synced:
-            current_time = utime.localtime(utime.time() + 7200) # UTC+2 für Sommerzeit
-            zeit_str = f"{current_time[3]:02d}:{current_time[4]:02d}"
+# --- main loop ---
+async def main():
+    global letzte_gasmessung, last_ntp_sync, time_synced, last_save_time, consecutive_errors
+    global co2_trend, voc_trend, temp_trend, humi_trend, display_fehler
+    display_task = None
+
+    while True:
+        try:
+            # ----- Fehler der vorherigen Display-Aktualisierung (z.B. BUSY-Timeout) -----
+            if display_fehler is not None:
+                e, display_fehler = display_fehler, None
+                raise e
+
+            # ----- Zeit-Synchronisation (NTP) -----
+            if NTP_AVAILABLE and (not time_synced or utime.time() - last_ntp_sync > 21600):
+                if wlan.isconnected():
+                    try:
+                        print("Synchronisiere Uhrzeit via NTP...")
+                        ntptime.settime()
+                        last_ntp_sync = utime.time()
+                        time_synced = True
+                        print("Uhrzeit synchronisiert.")
+                    except Exception as e:
+                        print(f"NTP-Fehler: {e}")
+                        time_synced = False
+                else:
+                    print("Kein WLAN für NTP-Sync.")
+
+            # ----- MQTT-Verbindung -----
+            if mqtt_client_hass.sock is None:
+                print("MQTT-Verbindung wird aufgebaut...")
+                if not wlan.isconnected(): connectWifi()
+                mqtt_client_hass.connect()
+                print("MQTT verbunden.")
+
+            ###
+            # 1. Daten auslesen
+            ###
+            # BME680 im Hintergrund messen lassen, waehrend der CO2-Sensor liest
+            bme_task = asyncio.create_task(bme680.measure())
+            await asyncio.sleep(0)
+            co2 = mhz.measure()[0]
+            messung = await bme_task # eine Messung fuer alle Werte
+            temp = messung.temperature + temperature_offset
+            humi = messung.humidity
+            voc = messung.gas
+
+            ###
+            # 2. Daten interpretieren & Logik für Dauerbetrieb
+            ###
+            co2_bewertung = "Gut"
+            if co2 > 1400: co2_bewertung = "Schlecht"
+            elif co2 > 1000: co2_bewertung = "Mittel"
+
+            # Feuchtekompensierter Gaswiderstand gegen den gelernten Basiswert, nur neue
+            # Gasmessungen zaehlen; in der Einlaufphase ohne Basiswert noch kein Ergebnis
+            if messung.gas_timestamp != letzte_gasmessung:
+                letzte_gasmessung = messung.gas_timestamp
+                luft.update(voc, messung.temperature, humi)
+            luftguete_prozent = luft.score
+            luftguete_text = "--" if luftguete_prozent is None else f"{luftguete_prozent:.0f}"
+
+            zeit_str = "--:--"
+            if time_synced:
+                current_time = utime.localtime(utime.time() + 7200) # UTC+2 für Sommerzeit
+                zeit_str = f"{current_time[3]:02d}:{current_time[4]:02d}"
         
-        # Periodisches Speichern des Basiswerts
-        if utime.time() - last_save_time > 1800: # Alle 30 Minuten
-            save_baseline(voc_baseline)
-            last_save_time = utime.time()
-
-        # --- ERWEITERT: Stabile Trend-Analyse für alle Werte ---
-        # 1. Historien aktualisieren
-        co2_history.append(co2)
-        voc_history.append(luftguete_prozent)
-        temp_history.append(temp)
-        humi_history.append(humi)
+            # Periodisches Speichern des Basiswerts
+            if utime.time() - last_save_time > 1800: # Alle 30 Minuten
+                save_baseline(luft)
+                last_save_time = utime.time()
+
+            # --- ERWEITERT: Stabile Trend-Analyse für alle Werte ---
+            # 1. Historien aktualisieren
+            co2_history.append(co2)
+            if luftguete_prozent is not None:
+                voc_history.append(luftguete_prozent)
+            temp_history.append(temp)
+            humi_history.append(humi)
         
-        # Sicherstellen, dass die Historien nicht zu lang werden
-        if len(co2_history) > history_size:
-            co2_history.pop(0)
-            voc_history.pop(0)
-            temp_history.pop(0)
-            humi_history.pop(0)
-
-        # 2. Trends nur berechnen, wenn wir genug Daten haben
-        if len(co2_history) == history_size:
-            co2_avg = sum(co2_history) / history_size
-            voc_avg = sum(voc_history) / history_size
-            temp_avg = sum(temp_history) / history_size
-            humi_avg = sum(humi_history) / history_size
+            # 2. Trends nur berechnen, wenn wir genug Daten haben
+            if len(co2_history) == history_size:
+                co2_avg = co2_history.mean()
+                voc_avg = voc_history.mean()
+                temp_avg = temp_history.mean()
+                humi_avg = humi_history.mean()
             
-            # Hysterese-Schwellen definieren
-            co2_hysteresis = 20
-            voc_hysteresis = 5
-            temp_hysteresis = 0.5 # Grad Celsius
-            humi_hysteresis = 2   # Prozentpunkte
+                # Hysterese-Schwellen definieren
+                co2_hysteresis = 20
+                voc_hysteresis = 5
+                temp_hysteresis = 0.5 # Grad Celsius
+                humi_hysteresis = 2   # Prozentpunkte
             
-            # CO2-Trend
-            if co2 > co2_avg + co2_hysteresis: co2_trend = '↑'
-            elif co2 < co2_avg - co2_hysteresis: co2_trend = '↓'
-            else: co2_trend = '→'
-
-            # VOC-Trend
-            if luftguete_prozent < voc_avg - voc_hysteresis: voc_trend = '↓'
-            elif luftguete_prozent > voc_avg + voc_hysteresis: voc_trend = '↑'
-            else: voc_trend = '→'
+                # CO2-Trend
+                if co2 > co2_avg + co2_hysteresis: co2_trend = '↑'
+                elif co2 < co2_avg - co2_hysteresis: co2_trend = '↓'
+                else: co2_trend = '→'
+
+                # VOC-Trend
+                if luftguete_prozent is None: voc_trend = '→'
+                elif luftguete_prozent < voc_avg - voc_hysteresis: voc_trend = '↓'
+                elif luftguete_prozent > voc_avg + voc_hysteresis: voc_trend = '↑'
+                else: voc_trend = '→'
             
-            # Temperatur-Trend
-            if temp > temp_avg + temp_hysteresis: temp_trend = '↑'
-            elif temp < temp_avg - temp_hysteresis: temp_trend = '↓'
-            else: temp_trend = '→'
-
-            # Feuchtigkeits-Trend
-            if humi > humi_avg + humi_hysteresis: humi_trend = '↑'
-            elif humi < humi_avg - humi_hysteresis: humi_trend = '↓'
-            else: humi_trend = '→'
-
-
-
-
-        ###
-        # 3. MQTT Daten senden
-        ###
-        mqtt_client_hass.publish(mqtt_publish_topic_hass_co2, str(co2))
-        mqtt_client_hass.publish(mqtt_publish_topic_hass_voc, str(voc))
-        mqtt_client_hass.publish(mqtt_publish_topic_hass_temp, str(temp))
-        mqtt_client_hass.publish(mqtt_publish_topic_hass_humi, str(humi))
-
-        ###
-        # 4. Dashboard zeichnen
-        ###
-        epd.image4Gray.fill(epd.white)
-        epd.image4Gray.text("RAUMKLIMA", 15, 8, epd.black)
-        epd.image4Gray.text(zeit_str, 120, 8, epd.black)
-        epd.image4Gray.hline(8, 24, 160, epd.black)
-        
-        epd.image4Gray.text(f"CO2 ({co2_trend})", 15, 45, epd.black)
-        epd.image4Gray.text(f"{co2} ppm", 100, 45, epd.black)
-        epd.image4Gray.text(f"({co2_bewertung})", 65, 65, epd.black)
-        epd.image4Gray.hline(8, 90, 160, epd.black)
-        
-        y_pos = 110
-        epd.image4Gray.text(f"Temperatur ({temp_trend})", 15, y_pos, epd.black)
-        epd.image4Gray.text(f"{temp:.1f} C", 115, y_pos, epd.black)
-        epd.image4Gray.hline(15, y_pos + 20, 146, epd.black)
-        
-        y_pos += 35
-        epd.image4Gray.text(f"Feuchtigkeit ({humi_trend})", 15, y_pos, epd.black)
-        epd.image4Gray.text(f"{humi:.1f} %", 115, y_pos, epd.black)
-        epd.image4Gray.hline(15, y_pos + 20, 146, epd.black)
-        
-        y_pos += 35
-        epd.image4Gray.text(f"Luftguete ({voc_trend})", 15, y_pos, epd.black)
-        epd.image4Gray.text(f"{luftguete_prozent:.0f} %", 115, y_pos, epd.black)
-
-        epd.EPD_2IN7_4Gray_Display(epd.buffer_4Gray)
-        print("Dashboard aktualisiert.")
+                # Temperatur-Trend
+                if temp > temp_avg + temp_hysteresis: temp_trend = '↑'
+                elif temp < temp_avg - temp_hysteresis: temp_trend = '↓'
+                else: temp_trend = '→'
+
+                # Feuchtigkeits-Trend
+                if humi > humi_avg + humi_hysteresis: humi_trend = '↑'
+                elif humi < humi_avg - humi_hysteresis: humi_trend = '↓'
+                else: humi_trend = '→'
+
+
+
+
+            ###
+            # 3. MQTT Daten senden
+            ###
+            mqtt_client_hass.publish(mqtt_publish_topic_hass_co2, str(co2))
+            mqtt_client_hass.publish(mqtt_publish_topic_hass_voc, str(voc))
+            mqtt_client_hass.publish(mqtt_publish_topic_hass_temp, str(temp))
+            mqtt_client_hass.publish(mqtt_publish_topic_hass_humi, str(humi))
+
+            ###
+            # 4. Dashboard zeichnen
+            ###
+            chart_co2.append(co2)
+            chart_temp.append(temp)
+            chart_humi.append(humi)
+
+            planer.update('co2', co2)
+            planer.update('temp', temp)
+            planer.update('humi', humi)
+            planer.update('luftguete', luftguete_prozent)
+            planer.update('zeit', current_time[3] * 60 + current_time[4] if time_synced else -1)
+            planer.update('co2_bewertung', co2_bewertung)
+            planer.update('co2_trend', co2_trend)
+            planer.update('temp_trend', temp_trend)
+            planer.update('humi_trend', humi_trend)
+            planer.update('voc_trend', voc_trend)
+            refresh_plan = planer.decide()
+
+            if refresh_plan is None:
+                print("Keine nennenswerte Aenderung, Display bleibt.", planer.stats())
+            else:
+                if time_synced and epd_mono_von <= current_time[3] < epd_mono_bis:
+                    profil = PROFILE_MONO
+                else:
+                    profil = PROFILE_4GRAY
+                # Ohne Doppelpuffer (oder bei Profilwechsel) die vorherige
+                # Aktualisierung abwarten, sonst wird gleich weitergezeichnet
+                if display_task is not None and (not epd.double_buffered or profil != epd.profile):
+                    task = display_task
+                    display_task = None
+                    await task
+                w_zeit.set(zeit_str)
+                w_co2_titel.set(f"CO2 ({co2_trend})")
+                w_co2.set(f"{co2}")
+                w_co2_bewertung.set(f"({co2_bewertung})")
+                w_temp_titel.set(f"Temperatur ({temp_trend})")
+                w_temp.set(f"{temp:.1f} C")
+                w_humi_titel.set(f"Feuchtigkeit ({humi_trend})")
+                w_humi.set(f"{humi:.1f} %")
+                w_voc_titel.set(f"Luftguete ({voc_trend})")
+                w_voc.set(f"{luftguete_text} %")
+                dashboard.render()
+                epd.set_profile(profil)
+
+                # Die Aktualisierung laeuft im Hintergrund, waehrend die Schleife weiterlaeuft
+                display_task = asyncio.create_task(refresh_dashboard(refresh_plan == 'full'))
+
+            print(f"CO2: {co2} ppm ({co2_bewertung}), Temp: {temp:.1f} C, rH: {humi:.1f} %, Luftguete: {luftguete_text}% (VOC: {voc} Ohm, Base: {luft.baseline or 0:.0f})")
+            print("============\n")
+
+            consecutive_errors = 0
+
+        except (OSError, MQTTException) as e:
+            consecutive_errors += 1
+            print(f"FEHLER ({consecutive_errors}/3): {e}.")
+
+            if consecutive_errors >= 3:
+                print("Drei aufeinanderfolgende Fehler. Führe einen Neustart durch...")
+                sleep(1)
+                reset()
+            else:
+                print("Fehler wird vorübergehend ignoriert. Nächster Versuch in Kürze.")
         
-        print(f"CO2: {co2} ppm ({co2_bewertung}), Temp: {temp:.1f} C, rH: {humi:.1f} %, Luftguete: {luftguete_prozent:.0f}% (VOC: {voc} Ohm, Base: {voc_baseline:.0f})")
-        print("============\n")
+            # Setze die MQTT-Verbindung zurück, damit sie im nächsten Durchlauf neu versucht wird
+            if mqtt_client_hass is not None and mqtt_client_hass.sock is not None:
+                try:
+                    mqtt_client_hass.sock.close()
+                except OSError:
+                    pass
+            mqtt_client_hass.sock = None
+            await asyncio.sleep(3)
 
-        consecutive_errors = 0
+        gc.collect()
+        print(f"Warte {waitingTimeinS} Sekunden bis zur nächsten Messung...")
+        await asyncio.sleep(waitingTimeinS)
 
-    except (OSError, MQTTException) as e:
-        consecutive_errors += 1
-        print(f"FEHLER ({consecutive_errors}/3): {e}.")
 
-        if consecutive_errors >= 3:
-            print("Drei aufeinanderfolgende Fehler. Führe einen Neustart durch...")
-            sleep(1)
-            reset()
-        else:
-            print("Fehler wird vorübergehend ignoriert. Nächster Versuch in Kürze.")
-        
-        # Setze die MQTT-Verbindung zurück, damit sie im nächsten Durchlauf neu versucht wird
-        if mqtt_client_hass is not None and mqtt_client_hass.sock is not None:
-            try:
-                mqtt_client_hass.sock.close()
-            except OSError:
-                pass
-        mqtt_client_hass.sock = None
-        sleep(3)
-
-    gc.collect()
-    print(f"Warte {waitingTimeinS} Sekunden bis zur nächsten Messung...")
-    sleep(waitingTimeinS)
\ No newline at end of file
+asyncio.run(main())
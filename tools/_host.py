@@ -0,0 +1,51 @@
+"""
+Shared setup of the BME680 checks in ``tools/``, imported before the driver.
+
+On the host it stands in for what MicroPython provides: ``micropython.const``,
+the ``time.ticks_*`` functions and ``ubinascii``; ``accel`` is hidden so the
+pure Python versions run. On the board it only adds ``lib/`` to the path;
+copy it to the device next to the check (``mpremote cp tools/_host.py :``).
+
+``registers()`` holds the calibration of a real chip at its register
+addresses, for fake buses and sensors without one.
+"""
+
+import sys
+import time
+
+sys.path.append('lib')
+
+try:
+    import micropython
+except ImportError:
+    # host: the driver only needs const() from it, and no viper helpers
+    import types
+    micropython = types.ModuleType('micropython')
+    micropython.const = lambda value: value
+    sys.modules['micropython'] = micropython
+    sys.modules['accel'] = None
+    import binascii
+    sys.modules['ubinascii'] = binascii
+
+if not hasattr(time, 'ticks_ms'):
+    time.ticks_ms = lambda: int(time.monotonic() * 1000)
+    time.ticks_add = lambda ticks, delta: ticks + delta
+    time.ticks_diff = lambda a, b: a - b
+    time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+
+from binascii import unhexlify
+
+# calibration registers 0x89..0xA1 and 0xE1..0xF0, 0x00, 0x02, 0x04 of a chip
+COEFF1 = unhexlify('00ab660300c28d7ad75800b61ca6ff251e00003cf1d1f81e00')
+COEFF2 = unhexlify('404b2f002d14789cc2651ccbe2120000')
+BYTES = {0x00: 0x32, 0x02: 0x10, 0x04: 0x20}
+
+
+def registers():
+    """The 256 registers of the chip, all zero but the calibration."""
+    regs = bytearray(256)
+    regs[0x89:0x89 + len(COEFF1)] = COEFF1
+    regs[0xE1:0xE1 + len(COEFF2)] = COEFF2
+    for register, value in BYTES.items():
+        regs[register] = value
+    return regs
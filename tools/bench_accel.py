@@ -0,0 +1,123 @@
+"""
+Parity check and benchmark for the viper hot paths in ``lib/accel.py``.
+
+Runs on the board, with ``lib/`` copied to the device::
+
+    mpremote run tools/bench_accel.py
+
+Every accelerated function is compared with its pure Python version on
+random and edge-case input, then both are timed. ``encode_4gray`` runs for
+every refresh and must not allocate. On a port without the viper
+emitter (or on the host) it only reports that the fallback is in use.
+"""
+
+import gc
+import random
+import sys
+import time
+
+sys.path.append('lib')
+
+try:
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+except AttributeError:
+    def ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def ticks_diff(a, b):
+        return a - b
+
+try:
+    import accel
+except (ImportError, SyntaxError) as e:
+    accel = None
+    print('accel not available, pure Python fallback in use:', e)
+
+
+def timeit(label, func, args, repeat):
+    start = ticks_us()
+    for _ in range(repeat):
+        func(*args)
+    us = ticks_diff(ticks_us(), start) / repeat
+    print('  {:<8} {:>10.1f} us'.format(label, us))
+    return us
+
+
+def bench(name, fast, slow, args, repeat):
+    print(name)
+    slow_us = timeit('python', slow, args, repeat)
+    fast_us = timeit('viper', fast, args, repeat)
+    print('  speedup  {:>10.1f}x'.format(slow_us / fast_us if fast_us else 0))
+
+
+def check_encoder():
+    import epdcodec
+    src = bytearray(random.getrandbits(8) for _ in range(5808))
+    for hi, lo in ((epdcodec.GRAY_OLD_HI, epdcodec.GRAY_OLD_LO),
+                   (epdcodec.GRAY_NEW_HI, epdcodec.GRAY_NEW_LO)):
+        for start, end in ((0, None), (0, 1), (100, 144), (2903, 2904), (5, 5)):
+            a = bytearray(2904)
+            b = bytearray(2904)
+            accel.encode_4gray(src, a, hi, lo, start, end)
+            epdcodec.encode_4gray_py(src, b, hi, lo, start, end)
+            assert a == b, (start, end)
+    plane = bytearray(2904)
+    gc.collect()
+    gc.disable()
+    before = gc.mem_alloc()
+    for _ in range(10):
+        accel.encode_4gray(src, plane, epdcodec.GRAY_OLD_HI, epdcodec.GRAY_OLD_LO, 100, 144)
+    allocated = gc.mem_alloc() - before
+    gc.enable()
+    print('encode_4gray allocated {} bytes in 10 calls'.format(allocated))
+    assert allocated == 0, 'encode_4gray allocates'
+    bench('encode_4gray (one plane)', accel.encode_4gray, epdcodec.encode_4gray_py,
+          (src, plane, epdcodec.GRAY_OLD_HI, epdcodec.GRAY_OLD_LO), 10)
+
+
+def check_transpose():
+    import epdcodec
+    wide, high = 22, 264  # EPD_2IN7_Display_Landscape
+    src = bytearray(random.getrandbits(8) for _ in range(wide * high))
+    for w, h in ((wide, high), (1, 1), (3, 5)):
+        a = bytearray(w * h)
+        b = bytearray(w * h)
+        accel.transpose_pages(src, a, w, h)
+        epdcodec.transpose_pages_py(src, b, w, h)
+        assert a == b, (w, h)
+    plane = bytearray(wide * high)
+    bench('transpose_pages (landscape)', accel.transpose_pages, epdcodec.transpose_pages_py,
+          (src, plane, wide, high), 10)
+
+
+def check_read24():
+    import bme680
+    cases = [bytearray(b) for b in (b'\x00\x00\x00', b'\xff\xff\xff', b'\x80\x00\x01')]
+    cases += [bytearray(random.getrandbits(8) for _ in range(3)) for _ in range(200)]
+    for arr in cases:
+        assert accel.read24(arr) == bme680._read24_py(arr), arr
+    bench('read24', accel.read24, bme680._read24_py, (cases[3],), 1000)
+
+
+def check_mhz19():
+    import mhz19c
+    frames = [None, b'', b'\xff\x86', b'\x00' * 9]
+    for _ in range(500):
+        frame = bytearray(random.getrandbits(8) for _ in range(9))
+        frame[0] = 0xFF
+        frame[1] = 0x86
+        frames.append(bytes(frame))
+        frame[8] = (0x100 - sum(frame[1:8])) & 0xFF
+        frames.append(bytes(frame))
+    for frame in frames:
+        assert accel.mhz19_valid(frame) == mhz19c.is_valid_py(frame), frame
+    bench('mhz19_valid', accel.mhz19_valid, mhz19c.is_valid_py, (frames[-1],), 1000)
+
+
+if accel is not None:
+    check_encoder()
+    check_transpose()
+    check_read24()
+    check_mhz19()
+    print('all results equal')
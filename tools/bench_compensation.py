@@ -0,0 +1,215 @@
+"""
+Accuracy check and benchmark of the BME680 compensation engines in
+``lib/bme680.py``: the float formulas and the fixed-point ones
+(``fixed_point=True``).
+
+On the host (accuracy only) and on the board::
+
+    python tools/bench_compensation.py
+    mpremote cp tools/_host.py :
+    mpremote run tools/bench_compensation.py
+
+Raw conversions across the whole ADC range of every channel, at temperatures
+across the operating range, go through both engines with the calibration of
+a real chip. The largest differences are reported and checked against the
+accuracy of the sensor: the integer formulas truncate, mostly in the cubic
+pressure term, so the engines are not bit-identical.
+
+The fixed-point engine only avoids allocations while every intermediate is a
+small int of the board (below 2**30, larger ones are heap allocated long
+ints). On the host the same conversions, inside the operating range, are
+run with ``SmallInt`` constants that record every larger result. On the
+board both engines are timed, and the heap bytes one ``read_all()`` worth of
+compensation allocates are counted.
+"""
+
+import gc
+import sys
+import time
+
+import _host
+import bme680
+
+_REGS = _host.registers()
+
+# operating range of the sensor: temperature, humidity, pressure
+_RANGE = ((-40, 85), (0, 100), (300, 1100))
+# largest accepted difference: temperature, humidity, pressure, gas (relative), well
+# below the accuracy of the sensor (0.5 degrees, 3 %RH, 0.12 hPa relative)
+_TOLERANCE = (0.02, 0.1, 0.1, 0.001)
+
+
+class Calibrated(bme680.Adafruit_BME680):
+    """The compensation of the driver without a bus: only the calibration is read."""
+
+    def __init__(self):
+        self._last_reading = 0
+        self._gas_new = False
+        self._read_calibration()
+
+    def _read(self, register, length):
+        return _REGS[register:register + length]
+
+
+def frame(adc_temp, adc_pres=0, adc_hum=0, adc_gas=0, gas_range=0):
+    """The 15 bytes at MEAS_STATUS of a conversion with these raw values."""
+    data = bytearray(15)
+    data[0] = 0x80
+    data[2:5] = bytes(((adc_pres >> 12) & 0xFF, (adc_pres >> 4) & 0xFF, (adc_pres << 4) & 0xF0))
+    data[5:8] = bytes(((adc_temp >> 12) & 0xFF, (adc_temp >> 4) & 0xFF, (adc_temp << 4) & 0xF0))
+    data[8] = adc_hum >> 8
+    data[9] = adc_hum & 0xFF
+    data[13] = adc_gas >> 2
+    data[14] = ((adc_gas & 0x03) << 6) | 0x30 | gas_range
+    return data
+
+
+def compensate(sensor, data, fixed_point):
+    sensor._fixed_point = fixed_point
+    sensor._parse_gas(data)
+    sensor._parse(data)
+    return (sensor._calc_temperature(), sensor._calc_humidity(),
+            sensor._calc_pressure(), sensor._calc_gas())
+
+
+def conversions():
+    """Raw conversions across the ADC ranges."""
+    # temperature over the whole 20 bit ADC range
+    for adc_temp in range(0, 1 << 20, 997):
+        yield frame(adc_temp, 400000, 20000)
+    # about -40, 0, 25 and 85 degrees
+    for adc_temp in (330000, 420000, 480000, 620000):
+        for adc_pres in range(0, 1 << 20, 1021):
+            yield frame(adc_temp, adc_pres)
+        for adc_hum in range(0, 1 << 16, 61):
+            yield frame(adc_temp, 400000, adc_hum)
+    for gas_range in range(16):
+        for adc_gas in range(1024):
+            yield frame(500000, 400000, 20000, adc_gas, gas_range)
+
+
+def check_accuracy(sensor):
+    worst = [0.0, 0.0, 0.0, 0.0]
+    where = [None] * 4
+
+    def compare(data):
+        a = compensate(sensor, data, False)
+        b = compensate(sensor, data, True)
+        for i in range(4):
+            if i < 3 and not _RANGE[i][0] <= a[i] <= _RANGE[i][1]:
+                continue
+            diff = abs(a[i] - b[i])
+            if i == 3:
+                diff /= max(a[i], 1)
+            if diff > worst[i]:
+                worst[i] = diff
+                where[i] = (a[i], b[i])
+
+    for data in conversions():
+        compare(data)
+
+    ok = True
+    for name, diff, limit, values in zip(('temperature', 'humidity', 'pressure', 'gas'),
+                                         worst, _TOLERANCE, where):
+        print('{:<12} max diff {:.6f} (float, fixed: {})'.format(name, diff, values))
+        ok = ok and diff <= limit
+    assert ok, 'fixed-point results differ by more than the tolerance'
+    print('both engines agree within the tolerance')
+
+
+class SmallInt(int):
+    """An int whose arithmetic results stay ``SmallInt``; results that would be a
+    long int on the board are recorded in ``SmallInt.large``."""
+
+    large = {}
+
+
+def _small_op(name):
+    op = getattr(int, name)
+
+    def small_op(*args):
+        result = op(*args)
+        if isinstance(result, tuple):  # divmod
+            return tuple(small_op_result(value) for value in result)
+        return small_op_result(result)
+
+    def small_op_result(value):
+        if not isinstance(value, int):
+            return value  # NotImplemented, true division
+        if not -(1 << 30) <= value < 1 << 30:
+            caller = sys._getframe(2)
+            where = '{}:{}'.format(caller.f_code.co_name, caller.f_lineno)
+            SmallInt.large[where] = max(SmallInt.large.get(where, 0), abs(value))
+        return SmallInt(value)
+
+    return small_op
+
+
+for _name in ('add', 'sub', 'mul', 'floordiv', 'mod', 'divmod', 'lshift', 'rshift',
+              'and', 'or'):
+    setattr(SmallInt, '__{}__'.format(_name), _small_op('__{}__'.format(_name)))
+    setattr(SmallInt, '__r{}__'.format(_name), _small_op('__r{}__'.format(_name)))
+SmallInt.__neg__ = _small_op('__neg__')
+
+
+def check_small_ints(sensor):
+    """Run the fixed-point engine on ``SmallInt`` constants and ADC values."""
+    def small(values):
+        for value in values:
+            if not isinstance(value, tuple) and not -(1 << 30) <= value < 1 << 30:
+                SmallInt.large['constant'] = max(SmallInt.large.get('constant', 0), abs(value))
+        return tuple(small(v) if isinstance(v, tuple) else SmallInt(v) for v in values)
+
+    constants = sensor._temp_int, sensor._pressure_int, sensor._humidity_int, sensor._gas_int
+    sensor._temp_int, sensor._pressure_int, sensor._humidity_int, sensor._gas_int = (
+        small(c) for c in constants)
+    for data in conversions():
+        values = compensate(sensor, data, False)
+        # inside the operating range, humidity not clipped
+        if not all(_RANGE[i][0] < values[i] < _RANGE[i][1] for i in range(3)):
+            continue
+        sensor._fixed_point = True
+        sensor._parse_gas(data)
+        sensor._adc_gas = SmallInt(sensor._adc_gas)
+        sensor._parse(data)
+        sensor._t_fine = SmallInt(sensor._t_fine)
+        sensor._adc_pres = SmallInt(sensor._adc_pres)
+        sensor._adc_hum = SmallInt(sensor._adc_hum)
+        sensor._calc_temperature()
+        sensor._calc_pressure()
+        sensor._calc_humidity()
+        sensor._calc_gas()
+    sensor._temp_int, sensor._pressure_int, sensor._humidity_int, sensor._gas_int = constants
+    for where, value in sorted(SmallInt.large.items()):
+        print('long int in {}: {}'.format(where, value))
+    assert not SmallInt.large, 'the fixed-point engine allocates long ints'
+    print('fixed-point intermediates are small ints in the operating range')
+
+
+def bench(sensor, repeat=200):
+    data = frame(520000, 410000, 22000, 400, 5)
+    for fixed_point in (False, True):
+        sensor._fixed_point = fixed_point
+        # one conversion: parse plus the four compensations of read_all()
+        gc.collect()
+        gc.disable()
+        before = gc.mem_alloc()
+        start = time.ticks_us()
+        for _ in range(repeat):
+            sensor._parse_gas(data)
+            sensor._parse(data)
+            sensor._update_reading()
+        us = time.ticks_diff(time.ticks_us(), start) / repeat
+        allocated = (gc.mem_alloc() - before) / repeat
+        gc.enable()
+        print('{:<6} {:>8.1f} us {:>8.1f} bytes allocated per reading'.format(
+            'fixed' if fixed_point else 'float', us, allocated))
+
+
+sensor = Calibrated()
+check_accuracy(sensor)
+if hasattr(gc, 'mem_alloc'):
+    bench(sensor)
+else:
+    check_small_ints(sensor)
+    print('timing and allocations are only measured on the board')
@@ -0,0 +1,143 @@
+"""
+Transaction count of the BME680 SPI transport against a fake bus.
+
+On the host and on the board (no sensor needed)::
+
+    python tools/check_bme680_spi.py
+    mpremote cp tools/_host.py :
+    mpremote run tools/check_bme680_spi.py
+
+``FakeBME680SPI`` answers like the chip: read/write bit, the two memory
+pages switched through register 0x73, address/data pairs for multiple writes
+in one frame, and a forced conversion that is done right away. It counts the
+CS-low frames, so the script can check how many one ``read_all()`` costs:
+one burst to start the conversion and one read of the results, with no
+memory page switches in between. ``fail_reads`` makes the next reads fail,
+a failed status read must not return the previous conversion again, and a
+bus where every read fails must raise ``OSError`` instead of polling forever.
+"""
+
+import time
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+import _host
+from bme680 import BME680_SPI
+
+
+class FakeBME680SPI:
+    """SPI bus with a BME680 behind it; also the chip select pin."""
+
+    def __init__(self):
+        regs = self.regs = _host.registers()
+        regs[0xD0] = 0x61
+        self.frames = 0
+        self.page_switches = 0
+        self.fail_reads = 0
+        self.temperature = bytes((0x7E, 0xF4, 0x00))
+        self._selected = False
+        self._read_from = None
+
+    def _register(self, address):
+        if address == 0x73:
+            return 0x73
+        return address if self.regs[0x73] & 0x10 else address | 0x80
+
+    def __call__(self, value):
+        if not value and not self._selected:
+            self.frames += 1
+        self._selected = not value
+        self._read_from = None
+
+    def write(self, buf):
+        assert self._selected, 'SPI write without chip select'
+        if buf[0] & 0x80:
+            self._read_from = self._register(buf[0] & 0x7F)
+            return
+        for i in range(0, len(buf), 2):
+            register = self._register(buf[i])
+            if register == 0x73 and (self.regs[0x73] ^ buf[i + 1]) & 0x10:
+                self.page_switches += 1
+            self.regs[register] = buf[i + 1]
+            if register == 0xE0 and buf[i + 1] == 0xB6:
+                self.regs[0x73] = 0x00  # soft reset
+            if register == 0x74 and buf[i + 1] & 0x03 == 0x01:
+                self._convert()
+
+    def readinto(self, buf):
+        assert self._read_from is not None, 'SPI read without address'
+        if self.fail_reads:
+            self.fail_reads -= 1
+            raise OSError('fake SPI read error')
+        for i in range(len(buf)):
+            buf[i] = self.regs[self._read_from + i]
+
+    def _convert(self):
+        regs = self.regs
+        regs[0x1F:0x22] = bytes((0x64, 0x19, 0x00))  # pressure
+        regs[0x22:0x25] = self.temperature
+        regs[0x25:0x27] = bytes((0x55, 0xF0))        # humidity
+        gas = 0x30 if regs[0x71] & 0x10 else 0x00    # gas_valid, heat_stab
+        regs[0x2A] = 0x64
+        regs[0x2B] = gas | 0x05
+        regs[0x1D] = 0x80
+
+
+def frames_per_sample(sensor, bus, samples=5):
+    sensor.read_all()  # config registers written once
+    frames = bus.frames
+    switches = bus.page_switches
+    for _ in range(samples):
+        time.sleep_ms(sensor._min_refresh_time)
+        sensor.read_all()
+    return (bus.frames - frames) / samples, (bus.page_switches - switches) / samples
+
+
+bus = FakeBME680SPI()
+sensor = BME680_SPI(bus, bus)
+print('init          {} frames, {} page switches'.format(bus.frames, bus.page_switches))
+reading = sensor.read_all()
+print('reading       {:.2f} C {:.1f} % {:.1f} hPa {} Ohm'.format(
+    reading.temperature, reading.humidity, reading.pressure, reading.gas))
+frames, switches = frames_per_sample(sensor, bus)
+print('per sample    {} frames, {} page switches'.format(frames, switches))
+assert frames == 2 and switches == 0, 'expected one write and one read frame per sample'
+sensor.gas_interval = 2
+frames, switches = frames_per_sample(sensor, bus, 6)
+print('gas every 2nd {} frames, {} page switches'.format(frames, switches))
+assert frames <= 2 and switches == 0
+last = reading.temperature  # read_all() updates the reading in place
+time.sleep_ms(sensor._min_refresh_time)
+bus.temperature = bytes((0x80, 0x00, 0x00))
+bus.fail_reads = 1
+failed = sensor.read_all().temperature
+print('read error    {:.2f} C, last {:.2f} C'.format(failed, last))
+assert failed != last, 'failed status read returned the last conversion'
+time.sleep_ms(sensor._min_refresh_time)
+bus.fail_reads = 1000
+try:
+    sensor.read_all()
+    raise AssertionError('read_all() of a dead bus returned')
+except OSError as e:
+    print('dead bus      {}'.format(e))
+bus.fail_reads = 0
+sensor.read_all()  # and recovers with the next conversion
+
+
+async def measure_dead_bus():
+    time.sleep_ms(sensor._min_refresh_time)
+    bus.fail_reads = 1000
+    try:
+        await sensor.measure()
+        raise AssertionError('measure() of a dead bus returned')
+    except OSError as e:
+        print('dead bus      {} (measure)'.format(e))
+    bus.fail_reads = 0
+    await sensor.measure()  # the lock is free again
+
+
+asyncio.run(measure_dead_bus())
+print('ok')
@@ -0,0 +1,96 @@
+"""
+Checks of the plane encoders in ``lib/epdcodec.py``.
+
+On the host and on the board::
+
+    python tools/check_epdcodec.py
+    mpremote run tools/check_epdcodec.py
+
+A frame with all four gray levels is encoded into the planes of the 4-gray
+refresh and into the 1-bit plane of the fast mono refresh. The mono plane
+must follow the brightness: white and the light gray white, the dark gray
+and black black.
+
+Random frames are also encoded by ``encode_4gray_py`` and ``encode_4gray``
+(the viper version on the board) and compared with ``reference_plane``, the
+per-pixel loop the driver used before the table encoder, for the old and the
+new plane.
+"""
+
+import random
+import sys
+
+sys.path.append('lib')
+
+import epdcodec
+
+WIDTH = 176
+HEIGHT = 264
+
+# GS2 value: (old bit, new bit, mono bit), 1 is white
+_BITS = {3: (1, 1, 1), 1: (1, 0, 1), 2: (0, 1, 0), 0: (0, 0, 0)}
+
+
+def levels_frame():
+    """GS2_HMSB frame whose pixels run through 3, 1, 2, 0 along every row, shifted
+    by one pixel per row, so every level sits at every bit position of a byte."""
+    frame = bytearray(WIDTH * HEIGHT // 4)
+    for y in range(HEIGHT):
+        for x in range(WIDTH):
+            value = (3, 1, 2, 0)[(x + y) % 4]
+            frame[(y * WIDTH + x) // 4] |= value << (2 * (x % 4))
+    return frame
+
+
+def plane_bit(plane, x, y):
+    i = y * WIDTH + x
+    return (plane[i // 8] >> (7 - i % 8)) & 1
+
+
+def reference_plane(src, white):
+    """The former per-pixel loop of ``EPD_2IN7_4Gray_Display``: eight pixels from
+    two source bytes, lowest bits first, MSB first into the plane byte. A pixel is
+    1 when its GS2 value is in ``white``."""
+    plane = bytearray(len(src) // 2)
+    for i in range(len(plane)):
+        temp3 = 0
+        for j in range(2):
+            temp1 = src[i * 2 + j]
+            for k in range(4):
+                temp3 = (temp3 << 1) | ((temp1 & 0x03) in white)
+                temp1 >>= 2
+        plane[i] = temp3
+    return plane
+
+
+def check_reference(frames=5):
+    for _ in range(frames):
+        frame = bytearray(random.getrandbits(8) for _ in range(WIDTH * HEIGHT // 4))
+        for hi, lo, white in ((epdcodec.GRAY_OLD_HI, epdcodec.GRAY_OLD_LO, (3, 1)),
+                              (epdcodec.GRAY_NEW_HI, epdcodec.GRAY_NEW_LO, (3, 2))):
+            expected = reference_plane(frame, white)
+            for encode in (epdcodec.encode_4gray_py, epdcodec.encode_4gray):
+                plane = bytearray(WIDTH * HEIGHT // 8)
+                encode(frame, plane, hi, lo)
+                assert plane == expected, (encode, white)
+    print('{} random frames encode like the per-pixel loop'.format(frames))
+
+
+def check_levels():
+    frame = levels_frame()
+    for index, (hi, lo) in enumerate(((epdcodec.GRAY_OLD_HI, epdcodec.GRAY_OLD_LO),
+                                      (epdcodec.GRAY_NEW_HI, epdcodec.GRAY_NEW_LO),
+                                      (epdcodec.MONO_HI, epdcodec.MONO_LO))):
+        plane = bytearray(WIDTH * HEIGHT // 8)
+        epdcodec.encode_4gray(frame, plane, hi, lo)
+        for y in range(HEIGHT):
+            for x in range(WIDTH):
+                value = (3, 1, 2, 0)[(x + y) % 4]
+                assert plane_bit(plane, x, y) == _BITS[value][index], (
+                    ('old', 'new', 'mono')[index], x, y, value)
+    print('four gray levels encode as expected, mono by brightness')
+
+
+check_levels()
+check_reference()
+print('ok')
@@ -0,0 +1,654 @@
+"""
+`epdsim` - host-side simulator for the 2.7inch e-Paper driver
+=============================================================
+
+Runs ``lib/epaper.py`` unchanged under CPython. ``install()`` registers
+stand-ins for the MicroPython modules the driver imports:
+
+* ``machine`` - ``Pin`` and ``SPI`` wired to a simulated controller
+* ``utime``   - a virtual clock; sleeps advance it instead of blocking
+* ``framebuf`` - a pure Python ``FrameBuffer`` (MONO_VLSB, MONO_HLSB,
+  MONO_HMSB, GS2_HMSB, GS4_HMSB, GS8) with the built-in 8x8 font
+
+The simulated controller decodes the command/data stream: it fills the
+0x10/0x13 planes (and the 0x14/0x15 partial windows) and, on 0x12/0x16,
+turns them back into pixels. 4-gray decoding is used when the last LUT set
+included 0x25, 1-bit otherwise. It counts bytes, CS-low transactions and SPI
+writes. Each refresh keeps BUSY high on the virtual clock for the frames of
+the loaded waveform (LUT 0x21) times ``frame_ms``. The panel content can be
+written as PGM or PNG.
+
+Usage::
+
+    import epdsim
+    panel = epdsim.install()
+    from epaper import EPD_2in7
+    epd = EPD_2in7()
+    ...
+    panel.save_png('dashboard.png')
+    print(panel.stats())
+
+or from the command line, to run a script (default: the demo in
+``lib/epaper.py``) and write the last frame::
+
+    python tools/epdsim.py [script.py] [--out frame.png] [--frames DIR]
+"""
+
+import os
+import struct
+import sys
+import time
+import types
+import zlib
+
+# GS2 pixel value -> brightness: the values are not in brightness order,
+# 1 (0x55, epd.grayish) is the light gray and 2 (0xaa, epd.darkgray) the dark one
+_BRIGHTNESS = {3: 255, 1: 170, 2: 85, 0: 0}
+
+LIB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib')
+
+
+class Clock:
+    """Virtual millisecond clock behind the simulated ``utime``."""
+
+    def __init__(self):
+        self.now_us = 0
+
+    def ticks_ms(self):
+        return self.now_us // 1000
+
+    def ticks_us(self):
+        return self.now_us
+
+    def sleep_us(self, us):
+        self.now_us += int(us)
+
+    def sleep_ms(self, ms):
+        self.now_us += int(ms * 1000)
+
+    def sleep(self, seconds):
+        self.now_us += int(seconds * 1000000)
+
+
+class SimPanel:
+    """Controller model fed by the simulated Pin and SPI objects."""
+
+    def __init__(self, width=176, height=264, rst_pin=12, dc_pin=8, cs_pin=9,
+                 busy_pin=13, frame_ms=10, power_on_ms=80, baudrate=4000000):
+        self.width = width
+        self.height = height
+        self.pin_ids = {'rst': rst_pin, 'dc': dc_pin, 'cs': cs_pin, 'busy': busy_pin}
+        self.frame_ms = frame_ms
+        self.power_on_ms = power_on_ms
+        self.baudrate = baudrate
+        self.clock = Clock()
+        self.pins = {}
+        plane = width * height // 8
+        self.old = bytearray(b'\xff' * plane)
+        self.new = bytearray(b'\xff' * plane)
+        # displayed pixels as GS2_HMSB values, 3 white, 1 light gray, 2 dark gray, 0 black
+        self.pixels = bytearray(b'\x03' * (width * height))
+        self.frame_hook = None
+        self.reset_stats()
+        self._reset_controller()
+
+    # -- bookkeeping -------------------------------------------------------
+
+    def reset_stats(self):
+        self.bytes_sent = 0
+        self.data_bytes = 0
+        self.commands = 0
+        self.transactions = 0
+        self.spi_writes = 0
+        self.busy_total_ms = 0
+        self.refreshes = {}
+        self.sleeps = 0
+
+    def stats(self):
+        """Counters since the last ``reset_stats()``. ``spi_ms`` is the wire
+        time of all bytes at the configured baudrate."""
+        return {
+            'bytes': self.bytes_sent,
+            'data_bytes': self.data_bytes,
+            'commands': self.commands,
+            'transactions': self.transactions,
+            'spi_writes': self.spi_writes,
+            'spi_ms': self.bytes_sent * 8 * 1000 / self.baudrate,
+            'busy_ms': self.busy_total_ms,
+            'refreshes': dict(self.refreshes),
+            'sleeps': self.sleeps,
+        }
+
+    def _reset_controller(self):
+        self.command = None
+        self.args = bytearray()
+        self.target = None
+        self.pos = 0
+        self.window = None
+        self.gray = False
+        self.lut_ww = bytearray()
+        self.asleep = False
+        self.busy_until = 0
+
+    # -- pin and bus callbacks ---------------------------------------------
+
+    def pin_value(self, pin_id):
+        if pin_id == self.pin_ids['busy']:
+            if self.clock.now_us < self.busy_until:
+                # jump to the end of the busy phase; the caller sees it once
+                self.clock.now_us = self.busy_until
+                return 1
+            return 0
+        pin = self.pins.get(pin_id)
+        return 0 if pin is None else pin._value
+
+    def pin_changed(self, pin_id, old, new):
+        if pin_id == self.pin_ids['cs'] and old == 1 and new == 0:
+            self.transactions += 1
+        elif pin_id == self.pin_ids['rst'] and old == 0 and new == 1:
+            self._reset_controller()
+
+    def spi_write(self, buf):
+        buf = bytes(buf)
+        self.spi_writes += 1
+        self.bytes_sent += len(buf)
+        self.clock.sleep_us(len(buf) * 8 * 1000000 // self.baudrate)
+        if self.pin_value(self.pin_ids['dc']) == 0:
+            for byte in buf:
+                self._command(byte)
+        else:
+            self.data_bytes += len(buf)
+            self._data(buf)
+
+    def _busy(self, ms):
+        self.busy_total_ms += ms
+        self.busy_until = self.clock.now_us + ms * 1000
+
+    # -- command decoding ----------------------------------------------------
+
+    def _command(self, cmd):
+        self.commands += 1
+        self.command = cmd
+        self.args = bytearray()
+        self.pos = 0
+        self.target = None
+        if cmd == 0x10:
+            self.target = self.old
+            self.window = None
+        elif cmd == 0x13:
+            self.target = self.new
+            self.window = None
+        elif cmd == 0x12:
+            self._refresh(None)
+        elif cmd == 0x04:
+            self.asleep = False
+            self._busy(self.power_on_ms)
+        elif cmd == 0x02:
+            self.sleeps += 1
+        elif cmd == 0x20:
+            self.gray = False
+        elif cmd == 0x21:
+            self.lut_ww = bytearray()
+
+    def _data(self, buf):
+        cmd = self.command
+        if cmd in (0x10, 0x13):
+            n = min(len(buf), len(self.target) - self.pos)
+            self.target[self.pos:self.pos + n] = buf[:n]
+            self.pos += n
+            return
+        if cmd in (0x14, 0x15):
+            for byte in buf:
+                if len(self.args) < 8:
+                    self.args.append(byte)
+                    if len(self.args) == 8:
+                        self.window = self._window(self.args)
+                        self.target = self.old if cmd == 0x14 else self.new
+                    continue
+                self._window_byte(byte)
+            return
+        if cmd == 0x16:
+            self.args.extend(buf)
+            if len(self.args) == 8:
+                self._refresh(self._window(self.args))
+            return
+        if cmd == 0x21:
+            self.lut_ww.extend(buf)
+        elif cmd == 0x25:
+            self.gray = True
+            return
+        if cmd == 0x07 and buf and buf[0] == 0xA5:
+            self.asleep = True
+
+    def _window(self, args):
+        x = (args[0] << 8 | args[1]) & ~7
+        y = args[2] << 8 | args[3]
+        w = (args[4] << 8 | args[5]) & ~7
+        h = args[6] << 8 | args[7]
+        return x, y, w, h
+
+    def _window_byte(self, byte):
+        x, y, w, h = self.window
+        row_bytes = w // 8
+        if row_bytes == 0 or self.pos >= row_bytes * h:
+            return
+        row, col = divmod(self.pos, row_bytes)
+        self.target[(y + row) * (self.width // 8) + x // 8 + col] = byte
+        self.pos += 1
+
+    def waveform_frames(self):
+        """Frames of the loaded waveform: per 6-byte LUT group the four
+        frame counts times the repeat count."""
+        lut = self.lut_ww
+        frames = 0
+        for g in range(0, len(lut) - 5, 6):
+            frames += (lut[g + 1] + lut[g + 2] + lut[g + 3] + lut[g + 4]) * lut[g + 5]
+        return frames
+
+    def _refresh(self, window):
+        if window is None:
+            x, y, w, h = 0, 0, self.width, self.height
+            kind = 'full'
+        else:
+            x, y, w, h = window
+            kind = 'partial'
+        kind += '_4gray' if self.gray else '_mono'
+        wide = self.width // 8
+        for row in range(y, min(y + h, self.height)):
+            for col in range(x, min(x + w, self.width)):
+                index = row * wide + (col >> 3)
+                bit = 7 - (col & 7)
+                n = (self.new[index] >> bit) & 1
+                if self.gray:
+                    o = (self.old[index] >> bit) & 1
+                    value = (n << 1) | o
+                else:
+                    value = 3 if n else 0
+                self.pixels[row * self.width + col] = value
+        self.refreshes[kind] = self.refreshes.get(kind, 0) + 1
+        self._busy(self.waveform_frames() * self.frame_ms)
+        if self.frame_hook is not None:
+            self.frame_hook(self, kind)
+
+    # -- export --------------------------------------------------------------
+
+    def gray_bytes(self):
+        """Displayed panel as 8-bit gray values, row-major."""
+        return bytes(_BRIGHTNESS[v] for v in self.pixels)
+
+    def save_pgm(self, path):
+        with open(path, 'wb') as f:
+            f.write(b'P5\n%d %d\n255\n' % (self.width, self.height))
+            f.write(self.gray_bytes())
+
+    def save_png(self, path):
+        gray = self.gray_bytes()
+        raw = bytearray()
+        for row in range(self.height):
+            raw.append(0)
+            raw.extend(gray[row * self.width:(row + 1) * self.width])
+
+        def chunk(tag, data):
+            body = tag + data
+            return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body))
+
+        with open(path, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+            f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, 0, 0, 0, 0)))
+            f.write(chunk(b'IDAT', zlib.compress(bytes(raw), 9)))
+            f.write(chunk(b'IEND', b''))
+
+    def diff(self, other):
+        """Number of pixels that differ from another panel or pixel buffer."""
+        pixels = other.pixels if isinstance(other, SimPanel) else other
+        return sum(1 for a, b in zip(self.pixels, pixels) if a != b)
+
+
+# -- machine -------------------------------------------------------------------
+
+def _machine_module(panel):
+    mod = types.ModuleType('machine')
+
+    class Pin:
+        IN = 0
+        OUT = 1
+        PULL_UP = 1
+        PULL_DOWN = 2
+        IRQ_FALLING = 4
+        IRQ_RISING = 8
+
+        def __init__(self, pin_id, mode=-1, pull=-1, value=None):
+            self.id = pin_id
+            self._value = 0 if value is None else value
+            panel.pins[pin_id] = self
+
+        def value(self, value=None):
+            if value is None:
+                return panel.pin_value(self.id)
+            old = self._value
+            self._value = 1 if value else 0
+            panel.pin_changed(self.id, old, self._value)
+
+        def __call__(self, value=None):
+            return self.value(value)
+
+        def on(self):
+            self.value(1)
+
+        def off(self):
+            self.value(0)
+
+        def irq(self, handler=None, trigger=None):
+            return None
+
+    class SPI:
+        def __init__(self, bus_id, *args, **kwargs):
+            self.bus_id = bus_id
+
+        def init(self, *args, **kwargs):
+            if 'baudrate' in kwargs:
+                panel.baudrate = kwargs['baudrate']
+
+        def write(self, buf):
+            panel.spi_write(buf)
+
+    mod.Pin = Pin
+    mod.SPI = SPI
+    return mod
+
+
+def _utime_module(clock):
+    mod = types.ModuleType('utime')
+    mod.ticks_ms = clock.ticks_ms
+    mod.ticks_us = clock.ticks_us
+    mod.ticks_diff = lambda a, b: a - b
+    mod.ticks_add = lambda a, b: a + b
+    mod.sleep = clock.sleep
+    mod.sleep_ms = clock.sleep_ms
+    mod.sleep_us = clock.sleep_us
+    mod.time = time.time
+    mod.localtime = time.localtime
+    return mod
+
+
+# -- framebuf --------------------------------------------------------------------
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS4_HMSB = 2
+GS8 = 6
+
+# MicroPython's 8x8 font for ASCII 32..127, one byte per column, LSB on top
+_FONT = bytes((
+    0x00,0x00,0x00,0x00,0x00,0x00,0x00,0x00, 0x00,0x00,0x00,0x4f,0x4f,0x00,0x00,0x00,
+    0x00,0x07,0x07,0x00,0x00,0x07,0x07,0x00, 0x14,0x7f,0x7f,0x14,0x14,0x7f,0x7f,0x14,
+    0x00,0x24,0x2e,0x6b,0x6b,0x3a,0x12,0x00, 0x00,0x63,0x33,0x18,0x0c,0x66,0x63,0x00,
+    0x00,0x32,0x7f,0x4d,0x4d,0x77,0x72,0x50, 0x00,0x00,0x00,0x04,0x06,0x03,0x01,0x00,
+    0x00,0x00,0x1c,0x3e,0x63,0x41,0x00,0x00, 0x00,0x00,0x41,0x63,0x3e,0x1c,0x00,0x00,
+    0x08,0x2a,0x3e,0x1c,0x1c,0x3e,0x2a,0x08, 0x00,0x08,0x08,0x3e,0x3e,0x08,0x08,0x00,
+    0x00,0x00,0x80,0xe0,0x60,0x00,0x00,0x00, 0x00,0x08,0x08,0x08,0x08,0x08,0x08,0x00,
+    0x00,0x00,0x00,0x60,0x60,0x00,0x00,0x00, 0x00,0x40,0x60,0x30,0x18,0x0c,0x06,0x02,
+    0x00,0x3e,0x7f,0x49,0x45,0x7f,0x3e,0x00, 0x00,0x40,0x44,0x7f,0x7f,0x40,0x40,0x00,
+    0x00,0x62,0x73,0x51,0x49,0x4f,0x46,0x00, 0x00,0x22,0x63,0x49,0x49,0x7f,0x36,0x00,
+    0x00,0x18,0x18,0x14,0x16,0x7f,0x7f,0x10, 0x00,0x27,0x67,0x45,0x45,0x7d,0x39,0x00,
+    0x00,0x3e,0x7f,0x49,0x49,0x7b,0x32,0x00, 0x00,0x03,0x03,0x79,0x7d,0x07,0x03,0x00,
+    0x00,0x36,0x7f,0x49,0x49,0x7f,0x36,0x00, 0x00,0x26,0x6f,0x49,0x49,0x7f,0x3e,0x00,
+    0x00,0x00,0x00,0x24,0x24,0x00,0x00,0x00, 0x00,0x00,0x80,0xe4,0x64,0x00,0x00,0x00,
+    0x00,0x08,0x1c,0x36,0x63,0x41,0x41,0x00, 0x00,0x14,0x14,0x14,0x14,0x14,0x14,0x00,
+    0x00,0x41,0x41,0x63,0x36,0x1c,0x08,0x00, 0x00,0x02,0x03,0x51,0x59,0x0f,0x06,0x00,
+    0x00,0x3e,0x7f,0x41,0x4d,0x4f,0x2e,0x00, 0x00,0x7c,0x7e,0x0b,0x0b,0x7e,0x7c,0x00,
+    0x00,0x7f,0x7f,0x49,0x49,0x7f,0x36,0x00, 0x00,0x3e,0x7f,0x41,0x41,0x63,0x22,0x00,
+    0x00,0x7f,0x7f,0x41,0x63,0x3e,0x1c,0x00, 0x00,0x7f,0x7f,0x49,0x49,0x41,0x41,0x00,
+    0x00,0x7f,0x7f,0x09,0x09,0x01,0x01,0x00, 0x00,0x3e,0x7f,0x41,0x49,0x7b,0x3a,0x00,
+    0x00,0x7f,0x7f,0x08,0x08,0x7f,0x7f,0x00, 0x00,0x00,0x41,0x7f,0x7f,0x41,0x00,0x00,
+    0x00,0x20,0x60,0x41,0x7f,0x3f,0x01,0x00, 0x00,0x7f,0x7f,0x1c,0x36,0x63,0x41,0x00,
+    0x00,0x7f,0x7f,0x40,0x40,0x40,0x40,0x00, 0x00,0x7f,0x7f,0x06,0x0c,0x06,0x7f,0x7f,
+    0x00,0x7f,0x7f,0x0e,0x1c,0x7f,0x7f,0x00, 0x00,0x3e,0x7f,0x41,0x41,0x7f,0x3e,0x00,
+    0x00,0x7f,0x7f,0x09,0x09,0x0f,0x06,0x00, 0x00,0x1e,0x3f,0x21,0x61,0x7f,0x5e,0x00,
+    0x00,0x7f,0x7f,0x19,0x39,0x6f,0x46,0x00, 0x00,0x26,0x6f,0x49,0x49,0x7b,0x32,0x00,
+    0x00,0x01,0x01,0x7f,0x7f,0x01,0x01,0x00, 0x00,0x3f,0x7f,0x40,0x40,0x7f,0x3f,0x00,
+    0x00,0x1f,0x3f,0x60,0x60,0x3f,0x1f,0x00, 0x00,0x7f,0x7f,0x30,0x18,0x30,0x7f,0x7f,
+    0x00,0x63,0x77,0x1c,0x1c,0x77,0x63,0x00, 0x00,0x07,0x0f,0x78,0x78,0x0f,0x07,0x00,
+    0x00,0x61,0x71,0x59,0x4d,0x47,0x43,0x00, 0x00,0x00,0x7f,0x7f,0x41,0x41,0x00,0x00,
+    0x00,0x02,0x06,0x0c,0x18,0x30,0x60,0x40, 0x00,0x00,0x41,0x41,0x7f,0x7f,0x00,0x00,
+    0x00,0x08,0x0c,0x06,0x06,0x0c,0x08,0x00, 0xc0,0xc0,0xc0,0xc0,0xc0,0xc0,0xc0,0xc0,
+    0x00,0x00,0x01,0x03,0x06,0x04,0x00,0x00, 0x00,0x20,0x74,0x54,0x54,0x7c,0x78,0x00,
+    0x00,0x7f,0x7f,0x44,0x44,0x7c,0x38,0x00, 0x00,0x38,0x7c,0x44,0x44,0x6c,0x28,0x00,
+    0x00,0x38,0x7c,0x44,0x44,0x7f,0x7f,0x00, 0x00,0x38,0x7c,0x54,0x54,0x5c,0x58,0x00,
+    0x00,0x08,0x7e,0x7f,0x09,0x03,0x02,0x00, 0x00,0x98,0xbc,0xa4,0xa4,0xfc,0x7c,0x00,
+    0x00,0x7f,0x7f,0x04,0x04,0x7c,0x78,0x00, 0x00,0x00,0x00,0x7d,0x7d,0x00,0x00,0x00,
+    0x00,0x40,0xc0,0x80,0x80,0xfd,0x7d,0x00, 0x00,0x7f,0x7f,0x30,0x38,0x6c,0x44,0x00,
+    0x00,0x00,0x41,0x7f,0x7f,0x40,0x00,0x00, 0x00,0x7c,0x7c,0x0c,0x18,0x0c,0x7c,0x78,
+    0x00,0x7c,0x7c,0x04,0x04,0x7c,0x78,0x00, 0x00,0x38,0x7c,0x44,0x44,0x7c,0x38,0x00,
+    0x00,0xfc,0xfc,0x24,0x24,0x3c,0x18,0x00, 0x00,0x18,0x3c,0x24,0x24,0xfc,0xfc,0x00,
+    0x00,0x7c,0x7c,0x04,0x04,0x0c,0x08,0x00, 0x00,0x48,0x5c,0x54,0x54,0x74,0x24,0x00,
+    0x00,0x04,0x04,0x3e,0x7e,0x44,0x44,0x00, 0x00,0x3c,0x7c,0x40,0x40,0x7c,0x7c,0x00,
+    0x00,0x1c,0x3c,0x60,0x60,0x3c,0x1c,0x00, 0x00,0x1c,0x7c,0x70,0x38,0x70,0x7c,0x1c,
+    0x00,0x44,0x6c,0x38,0x38,0x6c,0x44,0x00, 0x00,0x9c,0xbc,0xa0,0xe0,0x7c,0x3c,0x00,
+    0x00,0x44,0x64,0x74,0x5c,0x4c,0x44,0x00, 0x00,0x08,0x08,0x3e,0x77,0x41,0x41,0x00,
+    0x00,0x00,0x00,0xff,0xff,0x00,0x00,0x00, 0x00,0x41,0x41,0x77,0x3e,0x08,0x08,0x00,
+    0x00,0x02,0x03,0x01,0x03,0x02,0x03,0x01, 0xaa,0x55,0xaa,0x55,0xaa,0x55,0xaa,0x55,
+))
+
+
+class FrameBuffer:
+    """Pure Python subset of ``framebuf.FrameBuffer``."""
+
+    def __init__(self, buf, width, height, format, stride=None):
+        self.buf = buf
+        self.width = width
+        self.height = height
+        self.format = format
+        if stride is None:
+            stride = width
+        if format == MONO_HLSB or format == MONO_HMSB:
+            stride = (stride + 7) & ~7
+        elif format == GS2_HMSB:
+            stride = (stride + 3) & ~3
+        elif format == GS4_HMSB:
+            stride = (stride + 1) & ~1
+        self.stride = stride
+
+    def _get(self, x, y):
+        fmt = self.format
+        buf = self.buf
+        if fmt == GS2_HMSB:
+            i = x + y * self.stride
+            return (buf[i >> 2] >> ((i & 3) << 1)) & 3
+        if fmt == MONO_HLSB:
+            i = x + y * self.stride
+            return (buf[i >> 3] >> (7 - (i & 7))) & 1
+        if fmt == MONO_HMSB:
+            i = x + y * self.stride
+            return (buf[i >> 3] >> (i & 7)) & 1
+        if fmt == MONO_VLSB:
+            return (buf[(y >> 3) * self.stride + x] >> (y & 7)) & 1
+        if fmt == GS4_HMSB:
+            i = x + y * self.stride
+            return (buf[i >> 1] >> (0 if i & 1 else 4)) & 0x0f
+        return buf[x + y * self.stride]
+
+    def _set(self, x, y, c):
+        fmt = self.format
+        buf = self.buf
+        if fmt == GS2_HMSB:
+            i = x + y * self.stride
+            shift = (i & 3) << 1
+            buf[i >> 2] = (buf[i >> 2] & ~(3 << shift)) | ((c & 3) << shift)
+        elif fmt == MONO_HLSB or fmt == MONO_HMSB:
+            i = x + y * self.stride
+            bit = 7 - (i & 7) if fmt == MONO_HLSB else i & 7
+            if c & 1:
+                buf[i >> 3] |= 1 << bit
+            else:
+                buf[i >> 3] &= ~(1 << bit) & 0xff
+        elif fmt == MONO_VLSB:
+            i = (y >> 3) * self.stride + x
+            if c & 1:
+                buf[i] |= 1 << (y & 7)
+            else:
+                buf[i] &= ~(1 << (y & 7)) & 0xff
+        elif fmt == GS4_HMSB:
+            i = x + y * self.stride
+            if i & 1:
+                buf[i >> 1] = (buf[i >> 1] & 0xf0) | (c & 0x0f)
+            else:
+                buf[i >> 1] = (buf[i >> 1] & 0x0f) | ((c & 0x0f) << 4)
+        else:
+            buf[x + y * self.stride] = c & 0xff
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.height)
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                self._set(xx, yy, c)
+
+    def fill(self, c):
+        self.fill_rect(0, 0, self.width, self.height, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x1, y1, x2, y2, c):
+        dx = abs(x2 - x1)
+        dy = -abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x1, y1, c)
+            if x1 == x2 and y1 == y2:
+                return
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x1 += sx
+            if e2 <= dx:
+                err += dx
+                y1 += sy
+
+    def text(self, s, x, y, c=1):
+        for ch in s:
+            code = ord(ch)
+            if code < 32 or code > 127:
+                code = 127
+            glyph = (code - 32) * 8
+            for j in range(8):
+                column = _FONT[glyph + j]
+                for k in range(8):
+                    if column & (1 << k):
+                        self.pixel(x + j, y + k, c)
+            x += 8
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            fbuf = FrameBuffer(*fbuf)
+        for sy in range(fbuf.height):
+            yy = y + sy
+            if not 0 <= yy < self.height:
+                continue
+            for sx in range(fbuf.width):
+                xx = x + sx
+                if not 0 <= xx < self.width:
+                    continue
+                c = fbuf._get(sx, sy)
+                if palette is not None:
+                    c = palette._get(c, 0)
+                if c != key:
+                    self._set(xx, yy, c)
+
+    def scroll(self, xstep, ystep):
+        w = self.width
+        h = self.height
+        xs = range(w - 1, -1, -1) if xstep > 0 else range(w)
+        ys = range(h - 1, -1, -1) if ystep > 0 else range(h)
+        for yy in ys:
+            for xx in xs:
+                sx = xx - xstep
+                sy = yy - ystep
+                if 0 <= sx < w and 0 <= sy < h:
+                    self._set(xx, yy, self._get(sx, sy))
+
+
+def _framebuf_module():
+    mod = types.ModuleType('framebuf')
+    mod.FrameBuffer = FrameBuffer
+    mod.MONO_VLSB = MONO_VLSB
+    mod.MONO_HLSB = MONO_HLSB
+    mod.MONO_HMSB = MONO_HMSB
+    mod.GS2_HMSB = GS2_HMSB
+    mod.GS4_HMSB = GS4_HMSB
+    mod.GS8 = GS8
+    return mod
+
+
+def install(**kwargs):
+    """Register the simulated ``machine``, ``utime`` and ``framebuf`` modules,
+    put ``lib/`` on ``sys.path`` and return the new ``SimPanel``. Keyword
+    arguments go to ``SimPanel``. Call before importing ``epaper``."""
+    panel = SimPanel(**kwargs)
+    sys.modules['machine'] = _machine_module(panel)
+    sys.modules['utime'] = _utime_module(panel.clock)
+    sys.modules['framebuf'] = _framebuf_module()
+    if LIB_DIR not in sys.path:
+        sys.path.insert(0, LIB_DIR)
+    return panel
+
+
+def main(argv):
+    import runpy
+    script = os.path.join(LIB_DIR, 'epaper.py')
+    out = 'epdsim.png'
+    frames = None
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == '--out':
+            out = args.pop(0)
+        elif arg == '--frames':
+            frames = args.pop(0)
+            os.makedirs(frames, exist_ok=True)
+        else:
+            script = arg
+    panel = install()
+    if frames is not None:
+        counter = [0]
+
+        def hook(p, kind):
+            counter[0] += 1
+            p.save_png(os.path.join(frames, '%03d_%s.png' % (counter[0], kind)))
+        panel.frame_hook = hook
+    runpy.run_path(script, run_name='__main__')
+    panel.save_png(out)
+    for key, value in panel.stats().items():
+        print('%-13s %s' % (key, value))
+    print('virtual time  %d ms' % panel.clock.ticks_ms())
+    print('written       %s' % out)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,170 @@
+"""
+Replay recorded BME680 traces through ``lib/iaq.py``.
+
+A trace is either the serial output of ``main.py`` (the ``Temp: ... rH: ...
+(VOC: ... Ohm`` lines, the temperature offset of ``main.py`` is added back
+with ``--offset``) or a CSV file with ``gas,temperature,humidity`` columns::
+
+    mpremote run main.py | tee trace.txt
+    python tools/iaq_replay.py trace.txt [--offset -3.3] [--fit] [--slope 0.04]
+
+prints the score per sample, ``--fit`` estimates ``humidity_slope`` from the
+trace (least squares of ``log(gas)`` over the absolute humidity, VOC dips
+left out).
+
+Without a trace a synthetic three-day trace with humidity swings and VOC
+events is checked instead, and ``update()`` is timed (also on the board with
+``mpremote run tools/iaq_replay.py``).
+"""
+
+import math
+import random
+import re
+import sys
+import time
+
+sys.path.append('lib')
+
+from iaq import IAQ, absolute_humidity
+
+try:
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+except AttributeError:
+    def ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def ticks_diff(a, b):
+        return a - b
+
+def read_trace(path, offset):
+    """(gas, temperature, humidity) per sample of a log or CSV file."""
+    log_line = re.compile(r'Temp: ([-\d.]+) C, rH: ([\d.]+) %.*VOC: (\d+) Ohm')
+    samples = []
+    with open(path) as f:
+        for line in f:
+            match = log_line.search(line)
+            if match:
+                samples.append((int(match.group(3)), float(match.group(1)) - offset,
+                                float(match.group(2))))
+                continue
+            fields = line.strip().split(',')
+            if len(fields) == 3:
+                try:
+                    samples.append((float(fields[0]), float(fields[1]), float(fields[2])))
+                except ValueError:
+                    pass  # header
+    return samples
+
+
+def _regression(points):
+    n = len(points)
+    mx = sum(x for x, _ in points) / n
+    my = sum(y for _, y in points) / n
+    sxx = sum((x - mx) ** 2 for x, _ in points)
+    sxy = sum((x - mx) * (y - my) for x, y in points)
+    slope = sxy / sxx if sxx else 0.0
+    return slope, my - slope * mx
+
+
+def fit_slope(samples):
+    """``humidity_slope`` that makes ``log(gas)`` independent of the absolute humidity.
+    A second pass leaves out the samples more than 20 % below the first fit, the VOC
+    events, which would otherwise flatten the slope."""
+    points = [(absolute_humidity(t, h), math.log(g)) for g, t, h in samples if g > 0]
+    slope, offset = _regression(points)
+    clean = [(x, y) for x, y in points if y - (offset + slope * x) > math.log(0.8)]
+    if len(clean) > 1:
+        slope, offset = _regression(clean)
+    return -slope
+
+
+def synthetic(days=3, slope=0.04, seed=1):
+    """One sample per minute: 80 kOhm clean air, rH swinging 35..65 % twice a day,
+    a VOC event (gas down to 30 %) of an hour every evening."""
+    rnd = random.Random(seed) if hasattr(random, 'Random') else random
+    samples = []
+    for minute in range(days * 1440):
+        temperature = 24.0 + 1.5 * math.sin(minute * 2 * math.pi / 1440)
+        humidity = 50.0 + 15.0 * math.sin(minute * 4 * math.pi / 1440)
+        gas = 80000.0 * math.exp(-slope * absolute_humidity(temperature, humidity))
+        if 1140 <= minute % 1440 < 1200:
+            gas *= 0.3
+        gas *= 1.0 + (rnd.random() - 0.5) * 0.02
+        samples.append((int(gas), temperature, humidity))
+    return samples
+
+
+def check_synthetic():
+    samples = synthetic()
+    compensated = IAQ()
+    plain = IAQ(humidity_slope=0.0)
+    lowest = {'clean': [100.0, 100.0], 'event': [0.0, 0.0]}
+    for minute, (gas, temperature, humidity) in enumerate(samples):
+        scores = (compensated.update(gas, temperature, humidity),
+                  plain.update(gas, temperature, humidity))
+        if minute < 1440:
+            continue  # first day: burn-in and settling
+        of_day = minute % 1440
+        for i, score in enumerate(scores):
+            if 1140 <= of_day < 1200:
+                lowest['event'][i] = max(lowest['event'][i], score)
+            elif not 1140 <= of_day < 1320:  # two hours to recover
+                lowest['clean'][i] = min(lowest['clean'][i], score)
+    print('clean air, lowest score:  compensated {:.0f}  uncompensated {:.0f}'.format(
+        *lowest['clean']))
+    print('VOC event, highest score: compensated {:.0f}  uncompensated {:.0f}'.format(
+        *lowest['event']))
+    assert lowest['clean'][0] >= 90, 'humidity swings lower the compensated score'
+    assert lowest['event'][0] <= 50, 'VOC event not detected'
+
+    # a restored baseline gives a score right away
+    restored = IAQ()
+    restored.baseline = compensated.baseline
+    assert restored.update(*samples[0]) is not None
+    print('synthetic trace ok')
+
+
+def bench(repeat=1000):
+    iaq = IAQ(burn_in=0)
+    start = ticks_us()
+    for i in range(repeat):
+        iaq.update(50000 + i, 22.5, 45.0)
+    print('update  {:.1f} us'.format(ticks_diff(ticks_us(), start) / repeat))
+
+
+def main(args):
+    offset = 0.0
+    slope = None
+    fit = False
+    paths = []
+    while args:
+        arg = args.pop(0)
+        if arg == '--offset':
+            offset = float(args.pop(0))
+        elif arg == '--slope':
+            slope = float(args.pop(0))
+        elif arg == '--fit':
+            fit = True
+        else:
+            paths.append(arg)
+    if not paths:
+        check_synthetic()
+        bench()
+        return
+    for path in paths:
+        samples = read_trace(path, offset)
+        print('{}: {} samples'.format(path, len(samples)))
+        if not samples:
+            continue
+        if fit:
+            print('humidity_slope {:.4f}'.format(fit_slope(samples)))
+        iaq = IAQ() if slope is None else IAQ(humidity_slope=slope)
+        for gas, temperature, humidity in samples:
+            score = iaq.update(gas, temperature, humidity)
+            print('{:>8} {:6.1f} {:6.1f}  {}'.format(
+                gas, temperature, humidity, '--' if score is None else '%.0f' % score))
+        print('baseline {:.0f} Ohm'.format(iaq.baseline))
+
+
+main(list(getattr(sys, 'argv', [])[1:]))
@@ -0,0 +1,142 @@
+"""
+Generate packed glyph tables for ``lib/fonts.py``.
+
+The glyphs are drawn from stroke outlines (lines and elliptic arcs on a
+design grid 16 units high), supersampled 4x4 and reduced to 1 or 2 bits per
+pixel. The result is written as a plain Python module that
+``fonts.load()`` turns into a ``Font``::
+
+    python tools/mkfont.py --height 24 --bpp 2 --out lib/font_digits24.py
+
+Runs on the host only.
+"""
+
+import argparse
+import math
+import os
+
+# design grid: cap height 16 units, y grows downwards,
+# arcs are (cx, cy, rx, ry, start, end) in degrees, 0 = right, 90 = down
+GLYPHS = {
+    ' ': (6, []),
+    '%': (11, [('arc', 3, 3.5, 2, 2.5, 0, 360), ('arc', 8, 12.5, 2, 2.5, 0, 360),
+               ('line', (9, 1), (2, 15))]),
+    '-': (8, [('line', (1.5, 9), (6.5, 9))]),
+    '.': (4, [('line', (2, 14.8), (2, 14.9))]),
+    ':': (4, [('line', (2, 5.8), (2, 5.9)), ('line', (2, 14.8), (2, 14.9))]),
+    '0': (10, [('arc', 5, 8, 3.8, 7, 0, 360)]),
+    '1': (10, [('line', (2.5, 4), (5.5, 1.2), (5.5, 15))]),
+    '2': (10, [('arc', 5, 5, 3.8, 3.8, 200, 380), ('line', (8.6, 6.4), (1.3, 15), (9, 15))]),
+    '3': (10, [('arc', 5, 4.6, 3.5, 3.6, 200, 450), ('arc', 5, 11.6, 3.8, 3.4, 270, 520)]),
+    '4': (10, [('line', (7, 15), (7, 1.2), (1, 11), (9.2, 11))]),
+    '5': (10, [('line', (8.5, 1), (2.2, 1), (1.6, 7.6)),
+               ('arc', 5, 10.6, 3.8, 4.4, 220, 520)]),
+    '6': (10, [('arc', 5, 11, 3.8, 4, 0, 360), ('arc', 9.5, 11, 8.3, 10, 180, 252)]),
+    '7': (10, [('line', (1, 1), (9, 1), (4, 15))]),
+    '8': (10, [('arc', 5, 4.5, 3.3, 3.5, 0, 360), ('arc', 5, 11.5, 3.8, 3.5, 0, 360)]),
+    '9': (10, [('arc', 5, 5, 3.8, 4, 0, 360), ('arc', 0.5, 5, 8.3, 10, 0, 72)]),
+    'C': (10, [('arc', 5.5, 8, 4.3, 7, 40, 320)]),
+}
+
+STROKE = 2.2
+MARGIN = 1.0
+SUPERSAMPLE = 4
+
+
+def _segments(strokes):
+    """Flatten the strokes into line segments."""
+    segments = []
+    for stroke in strokes:
+        if stroke[0] == 'line':
+            points = stroke[1:]
+        else:
+            _, cx, cy, rx, ry, start, end = stroke
+            steps = max(8, int(abs(end - start) / 6))
+            points = []
+            for i in range(steps + 1):
+                angle = math.radians(start + (end - start) * i / steps)
+                points.append((cx + rx * math.cos(angle), cy + ry * math.sin(angle)))
+        for a, b in zip(points, points[1:]):
+            segments.append((a, b))
+    return segments
+
+
+def _distance(px, py, segment):
+    (ax, ay), (bx, by) = segment
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    t = 0.0 if length == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length))
+    ex, ey = ax + t * dx - px, ay + t * dy - py
+    return math.sqrt(ex * ex + ey * ey)
+
+
+def render(char, height, bpp):
+    """Return ``(width, levels)`` of ``char`` with one level per pixel."""
+    advance, strokes = GLYPHS[char]
+    scale = (height - 2) / (16 + 2 * MARGIN)
+    width = max(1, int(round(advance * scale)))
+    segments = _segments(strokes)
+    top = (1 << bpp) - 1
+    samples = SUPERSAMPLE * SUPERSAMPLE
+    levels = []
+    for y in range(height):
+        for x in range(width):
+            covered = 0
+            for sy in range(SUPERSAMPLE):
+                for sx in range(SUPERSAMPLE):
+                    gx = (x + (sx + 0.5) / SUPERSAMPLE) / scale
+                    gy = (y - 1 + (sy + 0.5) / SUPERSAMPLE) / scale - MARGIN
+                    if any(_distance(gx, gy, s) <= STROKE / 2 for s in segments):
+                        covered += 1
+            levels.append((covered * top + samples // 2) // samples)
+    return width, levels
+
+
+def pack(levels, bpp):
+    """Pack levels MSB first, padded to a whole byte."""
+    data = bytearray((len(levels) * bpp + 7) // 8)
+    bit = 0
+    for level in levels:
+        data[bit >> 3] |= level << (8 - bpp - (bit & 7))
+        bit += bpp
+    return data
+
+
+def build(height, bpp, chars):
+    widths = bytearray()
+    data = bytearray()
+    for char in chars:
+        width, levels = render(char, height, bpp)
+        widths.append(width)
+        data += pack(levels, bpp)
+    return bytes(widths), bytes(data)
+
+
+def write_module(path, height, bpp, chars, widths, data):
+    with open(path, 'w') as f:
+        f.write('# generated by tools/mkfont.py, do not edit\n')
+        f.write(f'HEIGHT = {height}\n')
+        f.write(f'BPP = {bpp}\n')
+        f.write(f'CHARS = {chars!r}\n')
+        f.write(f'WIDTHS = {widths!r}\n')
+        f.write('DATA = (\n')
+        for i in range(0, len(data), 32):
+            f.write(f'    {data[i:i + 32]!r}\n')
+        f.write(')\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--height', type=int, default=24)
+    parser.add_argument('--bpp', type=int, choices=(1, 2), default=2)
+    parser.add_argument('--chars', default=''.join(sorted(GLYPHS)))
+    parser.add_argument('--out', default=os.path.normpath(
+        os.path.join(os.path.dirname(__file__), '..', 'lib', 'font_digits24.py')))
+    args = parser.parse_args()
+    widths, data = build(args.height, args.bpp, args.chars)
+    write_module(args.out, args.height, args.bpp, args.chars, widths, data)
+    print(f'{args.out}: {len(args.chars)} glyphs, {len(data)} bytes')
+
+
+if __name__ == '__main__':
+    main()